@@ -0,0 +1,260 @@
+import numpy as np
+
+from gym_battleships.envs.ObservationEncoder import get_observation_encoder
+from gym_battleships.envs.ShipPlacer import get_placement_table
+from PosteriorSampler import PosteriorSampler
+
+"""
+Class representing an agent shooting random fields which have not been shot yet.
+The agent has the same predict method as the stable baselines models and works on batches of radar boards.
+"""
+class RandomAgent:
+    """
+    Constructor for a RandomAgent object
+    Arguments:
+    water = Value of a water field (not shot yet) on the radar board.
+    seed = Optional seed of the random numbers of the agent.
+    observation_encoder = Optional ObservationEncoder of the observations, e.g. env.observation_encoder.
+    Without it the observations are radar boards.
+    """
+    def __init__(self, water=0, seed=None, observation_encoder=None):
+        self.water = water
+        self.generator = np.random.default_rng(seed)
+        self.observation_encoder = observation_encoder
+
+    '''
+    Method choosing a random valid action for every radar board.
+    observation: Radar board or batch of radar boards
+    return: Actions and None as state, like model.predict
+    '''
+    def predict(self, observation, state=None, mask=None, deterministic=False):
+        if self.observation_encoder is None:
+            observation = np.asarray(observation)
+            single = observation.ndim == 2
+            boards = observation.reshape(-1, observation.shape[-2] * observation.shape[-1])
+        else:
+            radar, single = decode_observation(self.observation_encoder, observation)
+            boards = radar.reshape(len(radar), -1)
+        # Random score for every water field, the highest score is shot
+        scores = self.generator.random(boards.shape) * (boards == self.water)
+        actions = np.argmax(scores, axis=1)
+        return (actions[0] if single else actions), None
+
+
+"""
+Class representing a hunt/target agent shooting the field covered by most legal placements of the remaining ships.
+For every ship length and alignment the legal start fields are taken from the placement tables of the environment,
+a placement is legal if none of its fields was missed or belongs to a sunken ship (or with gap touches one).
+Placements through hit fields are weighted by target_weight, so hit ships are finished first (target mode),
+otherwise the densest field is searched (hunt mode). All counts are sums over the fields of the placements,
+computed for all ship lengths, both alignments and a batch of boards with two matrix products.
+"""
+class ProbabilityDensityAgent:
+    """
+    Constructor for a ProbabilityDensityAgent object
+    Arguments:
+    config = Configuration Object for the battleships game.
+    fieldEncoding = Encoding of the radar board, like BattleshipsEnv.fieldEncoding.
+    target_weight = Weight of a placement per hit field it covers.
+    seed = Optional seed of the random tie-breaking, an int or a numpy SeedSequence.
+    """
+    def __init__(self, config, fieldEncoding=None, target_weight=50, seed=None):
+        if fieldEncoding is None:
+            fieldEncoding = {'W': 0, 'X': 1, '#': 2, '0': -1}
+        self.fieldEncoding = fieldEncoding
+        # Observations are decoded to radar boards, so the agent works with every observation encoding
+        self.observation_encoder = get_observation_encoder(config.observation_encoding, config.board_size)
+        self.board_size = config.board_size
+        self.gap = config.gap
+        self.target_weight = target_weight
+        self.generator = np.random.default_rng(seed)
+        # Number of ships of every length, index is the length
+        self.fleet_counts = np.bincount(config.ships)
+        self.lengths = np.unique(config.ships)
+        # Legal start fields of every ship length, horizontal along the rows and vertical along the columns.
+        # Vertical starts are stored transposed, so both alignments are computed along the last axis,
+        # shape (alignment, 1, field, length * start field) to broadcast against the boards.
+        size = config.board_size
+        starts = np.zeros((2, 1, size, len(self.lengths), size), dtype=bool)
+        for index, length in enumerate(self.lengths):
+            table = get_placement_table(size, length, config.gap)
+            starts[0, 0, table.x[~table.is_vertical], index, table.y[~table.is_vertical]] = True
+            starts[1, 0, table.y[table.is_vertical], index, table.x[table.is_vertical]] = True
+        self.starts = starts.reshape(2, 1, size, -1)
+        # Fields along the last axis covered by the placement of every length and start field,
+        # shape (field, length * start field). Sums over the fields of all placements are one matrix product.
+        fields = np.arange(size)
+        covered = (fields[:, None, None] >= fields) & (fields[:, None, None] < fields + self.lengths[:, None])
+        self.covers = covered.reshape(size, -1).astype(np.float32)
+
+    '''
+    Method choosing the field with the highest placement density for every observation.
+    observation: Observation or batch of observations in the encoding of the config
+    deterministic: Boolean whether ties are broken by the first field instead of randomly
+    return: Actions and None as state, like model.predict
+    '''
+    def predict(self, observation, state=None, mask=None, deterministic=False):
+        radar, single = decode_observation(self.observation_encoder, observation)
+        actions = self.choose(radar, deterministic)
+        return (actions[0] if single else actions), None
+
+    '''
+    Method choosing the field with the highest placement density for every radar board.
+    radar: Batch of radar boards
+    deterministic: Boolean whether ties are broken by the first field instead of randomly
+    '''
+    def choose(self, radar, deterministic=False):
+        water = radar == self.fieldEncoding['W']
+        hit = radar == self.fieldEncoding['X']
+        sunken = radar == self.fieldEncoding['#']
+        blocked = (radar == self.fieldEncoding['0']) | sunken
+        # Boards without sunken ships (most boards early in a game) need no neighbours and no ship runs
+        any_sunken = sunken.any()
+        if self.gap and any_sunken:
+            blocked |= neighbours(sunken)
+
+        density = self.density(blocked, hit, self.remaining_ships(sunken))
+        # Only water fields can be shot, a small random score breaks ties and covers boards without legal placements
+        noise = np.zeros(density.shape) if deterministic else self.generator.random(density.shape) * 0.5
+        scores = (density + noise + 1) * water
+        return np.argmax(scores.reshape(len(radar), -1), axis=1)
+
+    '''
+    Method counting for every field the weighted number of legal placements of the remaining ships covering it.
+    blocked: Boolean boards of fields no ship can be placed on
+    hit: Boolean boards of hit fields of ships which are not sunken yet
+    remaining: Number of remaining ships of every length per board
+    '''
+    def density(self, blocked, hit, remaining):
+        boards = len(blocked)
+        size = self.board_size
+        # Blocked and hit fields of both alignments, shape (alignment, blocked/hit, board, field, field)
+        fields = np.empty((2, 2, boards, size, size), dtype=np.float32)
+        fields[0, 0] = blocked
+        fields[0, 1] = hit
+        fields[1, 0] = blocked.transpose(0, 2, 1)
+        fields[1, 1] = hit.transpose(0, 2, 1)
+        # Blocked and hit fields of the placements of all lengths starting at every field
+        windows = fields @ self.covers
+        # A placement is legal if none of its fields is blocked, it counts once per remaining ship of its length
+        count = np.repeat(remaining[:, self.lengths], size, axis=1)[:, None, :]
+        weights = ((windows[:, 0] == 0) & self.starts) * (1 + self.target_weight * windows[:, 1]) * count
+        # Every field is covered by the placements of all lengths starting at most length - 1 fields before it
+        density = weights.astype(np.float32) @ self.covers.T
+        return density[0] + density[1].transpose(0, 2, 1)
+
+    '''
+    Method counting the ships of every length which are not sunken yet.
+    Sunken ships are found as runs of sunken fields in a row or column, single sunken fields are ships of length 1.
+    Without gap touching sunken ships merge into one run. Runs longer than the longest ship are not counted,
+    shorter runs are counted as a single ship of their length, so the remaining ships are only an estimate then.
+    sunken: Boolean boards of sunken fields
+    return: Array with the number of remaining ships per board and length
+    '''
+    def remaining_ships(self, sunken):
+        boards = len(sunken)
+        bins = len(self.fleet_counts)
+        if not sunken.any():
+            return np.broadcast_to(self.fleet_counts, (boards, bins))
+        # Runs of the rows and the columns in one pass, counted per board and length
+        board, length = run_lengths(np.stack([sunken, sunken.transpose(0, 2, 1)]))
+        ships = length > 1
+        sunken_counts = np.bincount(board[ships] * (bins + 1) + np.minimum(length[ships], bins),
+                                    minlength=boards * (bins + 1)).reshape(boards, bins + 1)
+        single = sunken & ~neighbours(sunken, diagonal=False)
+        sunken_counts[:, 1] += single.sum(axis=(1, 2))
+        return np.maximum(self.fleet_counts - sunken_counts[:, :bins], 0)
+
+
+"""
+Class representing an agent shooting the field with the highest hit probability under the posterior of the layouts.
+Every board has its own PosteriorSampler, which is updated with the radar on every call.
+A new game is detected by a radar board without shots. Boards without consistent samples are played
+with the probability density heuristic.
+"""
+class PosteriorAgent:
+    """
+    Constructor for a PosteriorAgent object
+    Arguments:
+    config = Configuration Object for the battleships game.
+    fieldEncoding = Encoding of the radar board, like BattleshipsEnv.fieldEncoding.
+    n_samples = Number of layouts sampled per board.
+    seed = Optional seed of the agent, every sampler and the fallback get an independent child seed.
+    """
+    def __init__(self, config, fieldEncoding=None, n_samples=1000, seed=None):
+        if fieldEncoding is None:
+            fieldEncoding = {'W': 0, 'X': 1, '#': 2, '0': -1}
+        self.config = config
+        self.fieldEncoding = fieldEncoding
+        self.n_samples = n_samples
+        self.samplers = []
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.fallback = ProbabilityDensityAgent(config, fieldEncoding, seed=self.seed_sequence.spawn(1)[0])
+
+    '''
+    Method choosing the water field with the highest hit probability for every observation.
+    observation: Observation or batch of observations in the encoding of the config
+    return: Actions and None as state, like model.predict
+    '''
+    def predict(self, observation, state=None, mask=None, deterministic=False):
+        radar, single = decode_observation(self.fallback.observation_encoder, observation)
+        while len(self.samplers) < len(radar):
+            self.samplers.append(PosteriorSampler(self.config, self.n_samples, self.fieldEncoding,
+                                                  seed=self.seed_sequence.spawn(1)[0]))
+
+        water = radar == self.fieldEncoding['W']
+        actions = self.fallback.choose(radar, deterministic)
+        for index, sampler in enumerate(self.samplers[:len(radar)]):
+            if water[index].all():
+                sampler.reset()
+            else:
+                sampler.update(radar[index])
+            if len(sampler):
+                actions[index] = np.argmax((sampler.probabilities() + 1) * water[index])
+        return (actions[0] if single else actions), None
+
+
+'''
+Method decoding an observation or a batch of observations to a batch of radar boards.
+observation_encoder: ObservationEncoder of the observations
+observation: Observation or batch of observations
+return: Radar boards of shape (boards, board_size, board_size) and whether a single observation was given
+'''
+def decode_observation(observation_encoder, observation):
+    observation = np.asarray(observation)
+    single = observation.shape == observation_encoder.shape
+    radar = observation_encoder.decode(observation)
+    size = observation_encoder.board_size
+    return radar.reshape(-1, size, size), single
+
+'''
+Method marking the neighbours of fields on batches of boards.
+fields: Boolean boards
+diagonal: Boolean whether diagonal neighbours are marked as well
+'''
+def neighbours(fields, diagonal=True):
+    size = fields.shape[-1]
+    padded = np.zeros(fields.shape[:-2] + (size + 2, size + 2), dtype=np.int8)
+    padded[..., 1:-1, 1:-1] = fields
+    if diagonal:
+        # Sum of the 3x3 block around every field, summed along the rows and then the columns, without the field
+        rows = padded[..., :-2, :] + padded[..., 1:-1, :] + padded[..., 2:, :]
+        counts = rows[..., :-2] + rows[..., 1:-1] + rows[..., 2:] - padded[..., 1:-1, 1:-1]
+    else:
+        counts = padded[..., :-2, 1:-1] + padded[..., 2:, 1:-1] + padded[..., 1:-1, :-2] + padded[..., 1:-1, 2:]
+    return counts > 0
+
+'''
+Method finding the runs of consecutive fields along the last axis.
+fields: Boolean boards of shape (..., boards, field, field)
+return: Board index and length of every run
+'''
+def run_lengths(fields):
+    padded = np.zeros(fields.shape[:-1] + (fields.shape[-1] + 2,), dtype=np.int8)
+    padded[..., 1:-1] = fields
+    steps = padded[..., 1:] - padded[..., :-1]
+    # Runs start and end in the same row of the flat array, the row is padded with a field on both sides
+    starts = np.flatnonzero(steps == 1)
+    ends = np.flatnonzero(steps == -1)
+    board_size = steps.shape[-2] * steps.shape[-1]
+    return starts // board_size % fields.shape[-3], ends - starts
@@ -0,0 +1,233 @@
+import argparse
+import itertools
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+from Config import Config
+from gym_battleships.envs import BattleshipsEnv, SparseBattleshipsEnv
+from gym_battleships.envs.ShipPlacer import get_ship_placer, SparseShipPlacer
+
+# Metrics where a higher value is better, all others are latencies or sizes where lower is better
+THROUGHPUT_METRICS = ('steps_per_sec', 'resets_per_sec')
+
+"""
+Micro-benchmark of the battleships environment.
+Measures steps/sec, resets/sec, place_ships and count_states latency and memory per environment for a sweep
+of board sizes, fleets and gap/static_placement/binary_reward settings.
+Results are written to a JSON file which can be passed as baseline to a later run to flag regressions.
+Example: python Benchmark.py --sizes 5 10 20 --output baseline.json
+         python Benchmark.py --sizes 5 10 20 --baseline baseline.json
+"""
+
+
+'''
+Method checking whether a fleet can be placed on a board.
+Tries a number of random placements with the placement tables of the ships.
+config: Configuration Object for the battleships game
+tries: Number of placements to try
+sparse: Boolean whether random tries are used instead of the placement tables, e.g. for large boards
+'''
+def fits(config, tries=200, sparse=False):
+    if sparse:
+        placer = SparseShipPlacer(config.board_size, config.ships, config.gap, max_tries=1000)
+        for _ in range(tries):
+            cells = {}
+            if all(placer.place(index, length, cells) for index, length in enumerate(config.ships)):
+                return True
+        return False
+    placer = get_ship_placer(config)
+    if any(len(table) == 0 for table in placer.tables):
+        return False
+    for _ in range(tries):
+        occupied = np.zeros(placer.words, dtype=np.uint64)
+        for table in placer.tables:
+            compatible = table.get_compatible(occupied)
+            if len(compatible) == 0:
+                break
+            occupied |= table.ship_mask[np.random.choice(compatible)]
+        else:
+            return True
+    return False
+
+'''
+Method calling a function repeatedly until min_time has passed.
+function: Function to call, returns the time it measured itself and the number of operations
+min_time: Minimum measured time in seconds
+return: Operations per second
+'''
+def throughput(function, min_time):
+    elapsed = 0.0
+    operations = 0
+    while elapsed < min_time:
+        measured, count = function()
+        elapsed += measured
+        operations += count
+    return operations / elapsed
+
+'''
+Method measuring the latency of single calls of a function.
+function: Function to call
+min_time: Minimum overall time in seconds
+return: List of latencies in microseconds
+'''
+def latencies(function, min_time):
+    samples = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time or len(samples) < 100:
+        begin = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - begin) * 1e6)
+    return samples
+
+'''
+Method playing one game by shooting all fields in random order.
+Only the steps are timed, the reset is not.
+env: Battleships environment
+return: Measured time and number of steps
+'''
+def play_game(env):
+    env.reset()
+    actions = np.random.permutation(env.board_size * env.board_size).tolist()
+    steps = 0
+    start = time.perf_counter()
+    for action in actions:
+        steps += 1
+        _, _, done, _ = env.step(action)
+        if done:
+            break
+    return time.perf_counter() - start, steps
+
+'''
+Method measuring the memory of an environment including its boards.
+config: Configuration Object for the battleships game
+env_class: Class of the environment
+count: Number of environments created for the measurement
+return: Bytes per environment
+'''
+def memory_per_env(config, env_class, count=16):
+    tracemalloc.start()
+    envs = [env_class(config) for _ in range(count)]
+    used, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del envs
+    return used / count
+
+'''
+Method running all measurements for one configuration.
+config: Configuration Object for the battleships game
+min_time: Minimum measured time in seconds per metric
+env_class: Class of the environment, BattleshipsEnv or SparseBattleshipsEnv
+'''
+def benchmark(config, min_time, env_class=BattleshipsEnv):
+    env = env_class(config)
+    results = {
+        'steps_per_sec': throughput(lambda: play_game(env), min_time)
+    }
+
+    def reset():
+        start = time.perf_counter()
+        env.reset()
+        return time.perf_counter() - start, 1
+    results['resets_per_sec'] = throughput(reset, min_time)
+
+    if env_class is SparseBattleshipsEnv:
+        samples = latencies(lambda: env.place_ships(), min_time)
+    else:
+        board = np.zeros((config.board_size, config.board_size), dtype='int')
+        ship_board = np.empty_like(board)
+        samples = latencies(lambda: env.place_ships(board, ship_board), min_time)
+    for percentile in (50, 90, 99):
+        results['place_ships_p%d_us' % percentile] = float(np.percentile(samples, percentile))
+
+    # count_states on a board in the middle of a game
+    env.reset()
+    fields = config.board_size * config.board_size
+    for action in np.random.permutation(fields)[:fields // 2]:
+        _, _, done, _ = env.step(int(action))
+        if done:
+            break
+    results['count_states_us'] = float(np.median(latencies(lambda: env.count_states(env.radar), min_time)))
+
+    results['memory_per_env_bytes'] = memory_per_env(config, env_class)
+    return results
+
+'''
+Method returning the name of a configuration in the results.
+'''
+def config_name(config):
+    return '%dx%d_%s_gap%d_static%d_binary%d' % (config.board_size, config.board_size,
+                                                 '-'.join(str(ship) for ship in config.ships), config.gap,
+                                                 config.static_placement, config.binary_reward)
+
+'''
+Method comparing results with a baseline.
+results: Dict with the metrics of every configuration
+baseline: Dict with the metrics of every configuration of an earlier run
+tolerance: Relative change which is still accepted
+return: List of regressions as tuples of (configuration, metric, baseline value, new value)
+'''
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            if not old:
+                continue
+            if metric in THROUGHPUT_METRICS:
+                regressed = value < old * (1 - tolerance)
+            else:
+                regressed = value > old * (1 + tolerance)
+            if regressed:
+                regressions.append((name, metric, old, value))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Micro-benchmark of the battleships environment')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 15, 20, 25], help='Board sizes')
+    parser.add_argument('--fleets', nargs='+', default=['3,2,2', '5,4,3,3,2'],
+                        help='Fleets as comma separated ship lengths, like Config.ships')
+    parser.add_argument('--gap', type=int, nargs='+', default=[0, 1], help='Values of Config.gap')
+    parser.add_argument('--static', type=int, nargs='+', default=[0, 1], help='Values of Config.static_placement')
+    parser.add_argument('--binary', type=int, nargs='+', default=[0, 1], help='Values of Config.binary_reward')
+    parser.add_argument('--sparse', action='store_true', help='Benchmark SparseBattleshipsEnv for large boards')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum measured seconds per metric')
+    parser.add_argument('--output', help='Path of the JSON file to write the results to')
+    parser.add_argument('--baseline', help='Path of a JSON file of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Accepted relative slowdown')
+    arguments = parser.parse_args()
+
+    results = {}
+    for board_size, fleet, gap, static, binary in itertools.product(arguments.sizes, arguments.fleets, arguments.gap,
+                                                                     arguments.static, arguments.binary):
+        config = Config(board_size, [int(ship) for ship in fleet.split(',')], bool(gap), bool(static), bool(binary))
+        name = config_name(config) + ('_sparse' if arguments.sparse else '')
+        if not fits(config, sparse=arguments.sparse):
+            print(name, 'skipped, the fleet does not fit the board')
+            continue
+        env_class = SparseBattleshipsEnv if arguments.sparse else BattleshipsEnv
+        results[name] = benchmark(config, arguments.min_time, env_class)
+        metrics = results[name]
+        print(name, 'steps/s %.0f' % metrics['steps_per_sec'], 'resets/s %.0f' % metrics['resets_per_sec'],
+              'place_ships p50/p99 %.1f/%.1fus' % (metrics['place_ships_p50_us'], metrics['place_ships_p99_us']),
+              'count_states %.1fus' % metrics['count_states_us'],
+              'memory %.0fB' % metrics['memory_per_env_bytes'])
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump({'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+                       'results': results}, file, indent=2, sort_keys=True)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, arguments.tolerance)
+        for name, metric, old, value in regressions:
+            print('Regression', name, metric, 'baseline %.2f' % old, 'now %.2f' % value)
+        if regressions:
+            raise SystemExit(1)
+        print('No regressions against', arguments.baseline)
@@ -12,10 +12,23 @@ class Config:
     static_placement => A static placement for ships over all iterations is used
     binary_reward => The reward will be +1 for a valid action and -1 for an invalid action
     to train an agent not to choose the same action multiple times.
+    info_mode => How the info dict of a step is built. 'full' creates a new dict on every step,
+    'reuse' updates one preallocated dict in place and 'none' skips the counts for lean training runs.
+    layout_pool => Optional path of a layout file created with LayoutPool.generate. New games draw their ships
+    from the pre-generated layouts instead of placing them.
+    profile => Measure the time spent in each phase of a game (shoot, check_done, place_ships, ...).
+    'allocations' counts the allocated memory blocks per phase as well. Read with env.profile_stats().
+    observation_encoding => Format of the observations: 'int' (int64 radar board), 'int8' (int8 radar board),
+    'packed' (2 bits per field, 4 fields per byte) or 'onehot' (uint8 tensor with one channel per state).
     """
-    def __init__(self, board_size, ships, gap, static_placement, binary_reward):
+    def __init__(self, board_size, ships, gap, static_placement, binary_reward, info_mode='full', layout_pool=None,
+                 profile=False, observation_encoding='int'):
         self.board_size = board_size
         self.ships = ships
         self.gap = gap
         self.static_placement = static_placement
         self.binary_reward = binary_reward
+        self.info_mode = info_mode
+        self.layout_pool = layout_pool
+        self.profile = profile
+        self.observation_encoding = observation_encoding
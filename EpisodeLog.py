@@ -0,0 +1,216 @@
+import json
+import os
+
+import numpy as np
+
+from EpisodeRecorder import EpisodeRecorder
+
+# Columns stored in every chunk, one .npy file each
+COLUMNS = ('observations', 'actions', 'rewards', 'dones', 'counts', 'game_starts')
+
+"""
+Class writing finished games into an append-only episode log on disk.
+The log is a directory with a log.json file and numbered chunks of finished games. Steps are collected in an
+EpisodeRecorder and written as a new chunk when it holds chunk_steps steps, so memory stays bounded.
+Opening an existing log continues it with the next chunk.
+"""
+class EpisodeLogWriter:
+    """
+    Constructor for an episode log writer object
+    Arguments:
+    path = Directory of the log, created if it does not exist.
+    board_size = Number of fields in x and y direction.
+    chunk_steps = Number of steps collected before a chunk is written.
+    """
+    def __init__(self, path, board_size, chunk_steps=65536):
+        self.path = path
+        self.board_size = board_size
+        self.chunk_steps = chunk_steps
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'log.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as file:
+                meta = json.load(file)
+            if meta['board_size'] != board_size:
+                raise ValueError('Episode log %s was written for board size %d' % (path, meta['board_size']))
+        else:
+            with open(meta_path, 'w') as file:
+                json.dump({'board_size': board_size}, file)
+        self.chunk = len(chunk_names(path))
+        self.recorder = EpisodeRecorder(board_size, min(chunk_steps, 1024))
+
+    '''
+    Method for appending a step, e.g. the result of env.step.
+    Same arguments as EpisodeRecorder.append_step.
+    '''
+    def append_step(self, action, observation, reward, done, info):
+        self.recorder.append_step(action, observation, reward, done, info)
+        if self.recorder.dones[self.recorder.size - 1]:
+            self.flush_if_full()
+
+    '''
+    Method for appending all steps of a finished game at once.
+    Same arguments as EpisodeRecorder.append_game, so the writer can be passed to evaluate as recorder.
+    '''
+    def append_game(self, actions, observations, rewards, counts):
+        self.recorder.append_game(actions, observations, rewards, counts)
+        self.flush_if_full()
+
+    def flush_if_full(self):
+        if self.recorder.game_starts[self.recorder.n_games] >= self.chunk_steps:
+            self.flush()
+
+    '''
+    Method writing all finished games as a new chunk. Steps of an unfinished game stay in memory.
+    The chunk is written to a temporary directory and renamed, so readers never see partial chunks.
+    '''
+    def flush(self):
+        recorder = self.recorder
+        if not recorder.n_games:
+            return
+        end = recorder.game_starts[recorder.n_games]
+        columns = {
+            'observations': recorder.observations[:end],
+            'actions': recorder.actions[:end],
+            'rewards': recorder.rewards[:end],
+            'dones': recorder.dones[:end],
+            'counts': recorder.counts[:end],
+            'game_starts': recorder.game_starts[:recorder.n_games + 1]
+        }
+        name = 'chunk_%06d' % self.chunk
+        temporary = os.path.join(self.path, '.' + name)
+        os.makedirs(temporary, exist_ok=True)
+        for column, values in columns.items():
+            np.save(os.path.join(temporary, column + '.npy'), values)
+        os.rename(temporary, os.path.join(self.path, name))
+        self.chunk += 1
+        recorder.clear()
+
+    # Writes the remaining finished games
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+"""
+Class reading an episode log written by EpisodeLogWriter.
+Chunks are memory mapped when they are accessed first, games and steps are iterated lazily.
+"""
+class EpisodeLogReader:
+    """
+    Constructor for an episode log reader object
+    Arguments:
+    path = Directory of the log.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'log.json')) as file:
+            self.board_size = json.load(file)['board_size']
+        self.names = chunk_names(path)
+        # Only the small game offsets are read up front to map game indices to chunks
+        games = [len(np.load(os.path.join(path, name, 'game_starts.npy'), mmap_mode='r')) - 1
+                 for name in self.names]
+        self.chunk_offsets = np.concatenate([[0], np.cumsum(games, dtype=np.int64)])
+        self.chunks = {}
+
+    '''
+    Method returning a chunk as EpisodeRecorder on memory mapped columns.
+    index: Index of the chunk
+    '''
+    def chunk(self, index):
+        if index not in self.chunks:
+            directory = os.path.join(self.path, self.names[index])
+            columns = [np.load(os.path.join(directory, column + '.npy'), mmap_mode='r') for column in COLUMNS]
+            self.chunks[index] = EpisodeRecorder.from_columns(self.board_size, *columns)
+        return self.chunks[index]
+
+    '''
+    Method returning the chunk and the index of a game within it.
+    index: Index of the game in the log
+    '''
+    def locate(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Game index %d out of range' % index)
+        chunk = int(np.searchsorted(self.chunk_offsets, index, side='right')) - 1
+        return self.chunk(chunk), index - self.chunk_offsets[chunk]
+
+    '''
+    Method returning the steps of a game as memory mapped views.
+    index: Index of the game in the log
+    '''
+    def game(self, index):
+        chunk, game = self.locate(index)
+        return chunk.game(game)
+
+    '''
+    Method iterating all games, yields dicts like EpisodeRecorder.game.
+    '''
+    def games(self):
+        for chunk_index in range(len(self.names)):
+            chunk = self.chunk(chunk_index)
+            for game in range(chunk.games):
+                yield chunk.game(game)
+
+    '''
+    Method iterating all steps, yields tuples of (action, observation, reward, done, counts).
+    '''
+    def steps(self):
+        for game in self.games():
+            for step in zip(game['actions'], game['observations'], game['rewards'], game['dones'], game['counts']):
+                yield step
+
+    '''
+    Method returning the amount of rounds used in each game.
+    '''
+    def rounds(self):
+        return np.concatenate([np.zeros(0, dtype=np.int64)] +
+                              [np.diff(np.load(os.path.join(self.path, name, 'game_starts.npy'), mmap_mode='r'))
+                               for name in self.names])
+
+    '''
+    Method returning the overall reward of each game.
+    '''
+    def overall_rewards(self):
+        return np.concatenate([np.zeros(0, dtype=np.int64)] +
+                              [self.chunk(index).overall_rewards() for index in range(len(self.names))])
+
+    '''
+    Method creating a Result object of a game with the history as list of tuples.
+    index: Index of the game in the log
+    '''
+    def to_result(self, index):
+        chunk, game = self.locate(index)
+        return chunk.to_result(game)
+
+    '''
+    Method displaying a recorded game again with the render method of an environment.
+    index: Index of the game in the log
+    env: Battleships environment used for rendering, its radar board is overwritten
+    mode: 'human' prints every round, 'rgb_array' returns the images of all rounds as one array instead
+    '''
+    def replay(self, index, env, mode='human'):
+        game = self.game(index)
+        if mode == 'rgb_array':
+            return env.renderer.rgb_array(game['observations'])
+        for round, (action, observation) in enumerate(zip(game['actions'], game['observations']), 1):
+            print('Round', round, 'Action', action)
+            env.radar = np.array(observation, dtype=env.radar.dtype)
+            env.render()
+
+    def __len__(self):
+        return int(self.chunk_offsets[-1])
+
+
+'''
+Method returning the names of all complete chunks of a log in order.
+path: Directory of the log
+'''
+def chunk_names(path):
+    return sorted(name for name in os.listdir(path) if name.startswith('chunk_'))
@@ -0,0 +1,193 @@
+import numpy as np
+
+from Result import Result
+
+"""
+Class recording the steps of many games in preallocated numpy columns.
+Radar boards are copied once into contiguous int8 storage, so recorded observations never alias the live board.
+The columns grow by doubling, memory is about board_size * board_size + 15 bytes per step.
+"""
+class EpisodeRecorder:
+    """
+    Constructor for an episode recorder object
+    Arguments:
+    board_size = Number of fields in x and y direction.
+    capacity = Number of steps allocated initially.
+    """
+    def __init__(self, board_size, capacity=1024):
+        self.board_size = board_size
+        self.size = 0
+        # Actions and counters fit into 16 bit for boards up to 181x181
+        index_type = np.int16 if board_size * board_size <= np.iinfo(np.int16).max else np.int32
+        # Columns with one row per step
+        self.observations = np.zeros((capacity, board_size, board_size), dtype=np.int8)
+        self.actions = np.zeros(capacity, dtype=index_type)
+        self.rewards = np.zeros(capacity, dtype=np.int32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        # Packed counters of the info dict: miss, hit, empty and sunken count
+        self.counts = np.zeros((capacity, 4), dtype=index_type)
+        # Index of the first step of every game, entry n_games is the end of the last finished game
+        self.game_starts = np.zeros(64, dtype=np.int64)
+        self.n_games = 0
+
+    '''
+    Method for making room for more steps.
+    steps: Number of steps to append
+    '''
+    def reserve(self, steps):
+        capacity = len(self.actions)
+        if self.size + steps <= capacity:
+            return
+        while capacity < self.size + steps:
+            capacity *= 2
+        for name in ('observations', 'actions', 'rewards', 'dones', 'counts'):
+            column = getattr(self, name)
+            grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    '''
+    Method creating a recorder on existing columns, e.g. memory mapped arrays of a saved chunk.
+    board_size: Number of fields in x and y direction
+    observations, actions, rewards, dones, counts: Columns with one row per step
+    game_starts: Index of the first step of every game and the end of the last game
+    '''
+    @staticmethod
+    def from_columns(board_size, observations, actions, rewards, dones, counts, game_starts):
+        recorder = EpisodeRecorder.__new__(EpisodeRecorder)
+        recorder.board_size = board_size
+        recorder.observations = observations
+        recorder.actions = actions
+        recorder.rewards = rewards
+        recorder.dones = dones
+        recorder.counts = counts
+        recorder.game_starts = game_starts
+        recorder.n_games = len(game_starts) - 1
+        recorder.size = int(game_starts[-1])
+        return recorder
+
+    '''
+    Method removing all finished games, the steps of an unfinished game are kept.
+    '''
+    def clear(self):
+        end = self.game_starts[self.n_games]
+        remaining = self.size - end
+        for name in ('observations', 'actions', 'rewards', 'dones', 'counts'):
+            column = getattr(self, name)
+            column[:remaining] = column[end:self.size]
+        self.size = remaining
+        self.game_starts[0] = 0
+        self.n_games = 0
+
+    '''
+    Method for appending a step, e.g. the result of env.step.
+    Accepts the results of a single environment or a vector environment with one game.
+    action: Performed action
+    observation: Radar Board
+    reward: Current reward for the performed action
+    done: Boolean if game has finished
+    info: Debug info
+    '''
+    def append_step(self, action, observation, reward, done, info):
+        self.reserve(1)
+        row = self.size
+        self.observations[row] = np.reshape(observation, (self.board_size, self.board_size))
+        self.actions[row] = np.reshape(action, -1)[0]
+        self.rewards[row] = np.reshape(reward, -1)[0]
+        self.dones[row] = np.reshape(done, -1)[0]
+        if isinstance(info, (list, tuple)):
+            info = info[0]
+        self.counts[row] = (info.get('miss_count', 0), info.get('hit_count', 0), info.get('empty_count', 0),
+                            info.get('sunken_count', 0))
+        self.size += 1
+        if self.dones[row]:
+            self.end_game()
+
+    '''
+    Method for appending all steps of a finished game at once.
+    actions: Array of the performed actions
+    observations: Array of the radar boards after each step
+    rewards: Array of the rewards of each step
+    counts: Array with miss, hit, empty and sunken count after each step
+    '''
+    def append_game(self, actions, observations, rewards, counts):
+        steps = len(actions)
+        self.reserve(steps)
+        rows = slice(self.size, self.size + steps)
+        self.observations[rows] = observations
+        self.actions[rows] = actions
+        self.rewards[rows] = rewards
+        self.counts[rows] = counts
+        self.dones[rows] = False
+        self.dones[self.size + steps - 1] = True
+        self.size += steps
+        self.end_game()
+
+    '''
+    Method for marking the end of the current game.
+    '''
+    def end_game(self):
+        if self.size > self.game_starts[self.n_games]:
+            if self.n_games + 1 == len(self.game_starts):
+                self.game_starts = np.concatenate([self.game_starts, np.zeros_like(self.game_starts)])
+            self.n_games += 1
+            self.game_starts[self.n_games] = self.size
+
+    '''
+    Number of finished games.
+    '''
+    @property
+    def games(self):
+        return self.n_games
+
+    '''
+    Method returning the steps of a game as views on the columns.
+    index: Index of the game
+    '''
+    def game(self, index):
+        rows = slice(self.game_starts[index], self.game_starts[index + 1])
+        return {
+            'observations': self.observations[rows],
+            'actions': self.actions[rows],
+            'rewards': self.rewards[rows],
+            'dones': self.dones[rows],
+            'counts': self.counts[rows]
+        }
+
+    '''
+    Method returning the amount of rounds used in each game.
+    '''
+    def rounds(self):
+        return np.diff(self.game_starts[:self.n_games + 1])
+
+    '''
+    Method returning the overall reward of each game.
+    '''
+    def overall_rewards(self):
+        if not self.games:
+            return np.zeros(0, dtype=np.int64)
+        end = self.game_starts[self.n_games]
+        return np.add.reduceat(self.rewards[:end].astype(np.int64), self.game_starts[:self.n_games])
+
+    '''
+    Method creating a Result object of a game with the history as list of tuples.
+    index: Index of the game
+    '''
+    def to_result(self, index):
+        game = self.game(index)
+        result = Result()
+        for round, (action, observation, reward, done, counts) in enumerate(
+                zip(game['actions'], game['observations'], game['rewards'], game['dones'], game['counts']), 1):
+            info = {'miss_count': counts[0], 'hit_count': counts[1], 'empty_count': counts[2],
+                    'sunken_count': counts[3]}
+            result.append_history(round, action, observation, reward, done, info)
+        result.set_rounds(len(game['actions']))
+        return result
+
+    '''
+    Number of bytes used by the columns.
+    '''
+    @property
+    def nbytes(self):
+        return (self.observations.nbytes + self.actions.nbytes + self.rewards.nbytes + self.dones.nbytes
+                + self.counts.nbytes + self.game_starts.nbytes)
@@ -0,0 +1,164 @@
+import multiprocessing
+
+import numpy as np
+
+from gym_battleships.envs import BattleshipsVecEnv
+
+"""
+Class representing the results of an evaluation over many games
+"""
+class EvaluationResult:
+    """
+    Constructor for an evaluation result object
+    Arguments:
+    rounds = Array with the amount of rounds used to finish each game.
+    rewards = Array with the overall reward of each game.
+    invalid = Boolean array whether a game ended with an invalid action (shooting a field twice).
+    """
+    def __init__(self, rounds, rewards, invalid):
+        self.rounds = np.asarray(rounds)
+        self.rewards = np.asarray(rewards)
+        self.invalid = np.asarray(invalid, dtype=bool)
+
+    '''
+    Method for combining the results of multiple evaluations.
+    results: List of evaluation results
+    '''
+    @staticmethod
+    def concatenate(results):
+        return EvaluationResult(np.concatenate([result.rounds for result in results]),
+                                np.concatenate([result.rewards for result in results]),
+                                np.concatenate([result.invalid for result in results]))
+
+    '''
+    Method calculating aggregate statistics of all games.
+    percentiles: Percentiles of rounds and rewards to report
+    '''
+    def statistics(self, percentiles=(5, 25, 50, 75, 95)):
+        shots = self.rounds.sum()
+        statistics = {
+            'games': len(self.rounds),
+            'mean_rounds': float(np.mean(self.rounds)),
+            'std_rounds': float(np.std(self.rounds)),
+            'invalid_game_rate': float(np.mean(self.invalid)),
+            'invalid_shot_rate': float(self.invalid.sum() / shots) if shots else 0.0,
+            'mean_reward': float(np.mean(self.rewards)),
+            'std_reward': float(np.std(self.rewards)),
+            'min_reward': float(np.min(self.rewards)),
+            'max_reward': float(np.max(self.rewards))
+        }
+        for percentile in percentiles:
+            statistics['p%d_rounds' % percentile] = float(np.percentile(self.rounds, percentile))
+            statistics['p%d_reward' % percentile] = float(np.percentile(self.rewards, percentile))
+        return statistics
+
+    def __len__(self):
+        return len(self.rounds)
+
+
+'''
+Method playing games with a batched environment and one batched predict call per step.
+agent: Model or agent with a predict method like the stable baselines models
+config: Configuration Object for the battleships game
+n_games: Number of games to play
+n_envs: Number of games played at the same time
+deterministic: Optional deterministic flag passed on to predict
+recorder: Optional EpisodeRecorder to record the steps of all games
+seed: Optional seed of the placement of the ships
+'''
+def evaluate(agent, config, n_games, n_envs=64, deterministic=None, recorder=None, seed=None):
+    n_envs = max(1, min(n_envs, n_games))
+    env = BattleshipsVecEnv(config, n_envs)
+    if seed is not None:
+        env.seed(seed)
+    observations = env.reset()
+    boards = np.arange(n_envs)
+
+    # Steps of the running games, a game has at most one step per field
+    if recorder is not None:
+        fields = config.board_size * config.board_size
+        game_actions = np.zeros((n_envs, fields), dtype='int')
+        game_observations = np.zeros((n_envs, fields, config.board_size, config.board_size), dtype=np.int8)
+        game_rewards = np.zeros((n_envs, fields), dtype=np.int32)
+        game_counts = np.zeros((n_envs, fields, 4), dtype='int')
+
+    # Every board plays a fixed number of games, so short games are not favoured
+    games_left = np.full(n_envs, n_games // n_envs)
+    games_left[:n_games % n_envs] += 1
+
+    rounds = np.zeros(n_envs, dtype='int')
+    rewards = np.zeros(n_envs)
+    results_rounds = []
+    results_rewards = []
+    results_invalid = []
+    kwargs = {} if deterministic is None else {'deterministic': deterministic}
+
+    while games_left.any():
+        actions, _states = agent.predict(observations, **kwargs)
+        step_rewards, done, valid = env.shoot(actions)
+        rounds += 1
+        rewards += step_rewards
+
+        # Store finished games of boards which still have games to play
+        finished = np.flatnonzero(done & (games_left > 0))
+        if recorder is not None:
+            step = rounds - 1
+            game_actions[boards, step] = actions
+            game_observations[boards, step] = env.radar
+            game_rewards[boards, step] = step_rewards
+            # Counts of invalid actions are 0 like in the info dict
+            game_counts[boards, step] = np.stack([env.miss_count, env.hit_count, env.empty_count,
+                                                  env.sunken_count], axis=1) * valid[:, None]
+            for index in finished:
+                steps = rounds[index]
+                recorder.append_game(game_actions[index, :steps], game_observations[index, :steps],
+                                     game_rewards[index, :steps], game_counts[index, :steps])
+        results_rounds.append(rounds[finished])
+        results_rewards.append(rewards[finished])
+        results_invalid.append(~valid[finished])
+        games_left[finished] -= 1
+
+        # Start new games on all finished boards
+        for index in np.flatnonzero(done):
+            env.set_up(index)
+        rounds[done] = 0
+        rewards[done] = 0
+        observations = env.observations
+
+    return EvaluationResult(np.concatenate(results_rounds), np.concatenate(results_rewards),
+                            np.concatenate(results_invalid))
+
+'''
+Method playing games in a pool of processes, every process evaluates a share of the games.
+agent_factory: Picklable function creating the agent in each process, e.g. functools.partial(ACKTR.load, path)
+config: Configuration Object for the battleships game
+n_games: Number of games to play
+n_workers: Number of processes
+n_envs: Number of games played at the same time in each process
+deterministic: Optional deterministic flag passed on to predict
+'''
+def evaluate_parallel(agent_factory, config, n_games, n_workers, n_envs=64, deterministic=None):
+    games = [n_games // n_workers + (1 if worker < n_games % n_workers else 0) for worker in range(n_workers)]
+    tasks = [(agent_factory, config, worker_games, n_envs, deterministic) for worker_games in games if worker_games]
+    with multiprocessing.Pool(len(tasks)) as pool:
+        results = pool.map(evaluate_worker, tasks)
+    return EvaluationResult.concatenate(results)
+
+'''
+Method running an evaluation in a worker process.
+task: Tuple with the arguments of evaluate and the agent factory instead of the agent
+'''
+def evaluate_worker(task):
+    agent_factory, config, n_games, n_envs, deterministic = task
+    return evaluate(agent_factory(), config, n_games, n_envs, deterministic)
+
+'''
+Method printing the statistics of an evaluation.
+result: Evaluation result
+'''
+def print_statistics(result):
+    statistics = result.statistics()
+    print("Games", statistics['games'], "Mean rounds", round(statistics['mean_rounds'], 2),
+          "Median rounds", statistics['p50_rounds'], "Invalid games", round(statistics['invalid_game_rate'], 4))
+    print("Mean reward", round(statistics['mean_reward'], 2), "Reward 5%/95%", statistics['p5_reward'],
+          statistics['p95_reward'])
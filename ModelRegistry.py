@@ -0,0 +1,180 @@
+import glob
+import importlib
+import os
+import re
+import zipfile
+from collections import OrderedDict, namedtuple
+
+# Directories with the saved models of every algorithm
+MODEL_DIRECTORIES = ('./ACKTR_Models', './DQN_Models')
+
+# Names of saved models, e.g. ACKTR_5x5_3_2_2_Dynamic or DQN_5x5_3er_SingleShot
+MODEL_NAME = re.compile(r'^(?P<algorithm>[A-Za-z0-9]+)_(?P<rows>\d+)x(?P<columns>\d+)_(?P<fleet>.+)_(?P<placement>[A-Za-z]+)$')
+
+# Placement mode in the model names by Config.static_placement: one static layout or a new layout every game
+PLACEMENTS = {True: 'SingleShot', False: 'Dynamic'}
+
+# Observation encodings of the saved models, they were trained on radar boards
+MODEL_OBSERVATION_ENCODINGS = ('int', 'int8')
+
+"""
+Saved model found by the registry.
+name = File name of the model without .zip
+algorithm = Name of the stable baselines class, e.g. 'ACKTR' or 'DQN'
+board_size = Number of fields in x and y direction
+ships = Tuple with the lengths of the ships, e.g. (3, 2, 2)
+placement = Placement mode the model was trained with, e.g. 'Dynamic' or 'SingleShot'
+path = Path of the zip file
+"""
+ModelEntry = namedtuple('ModelEntry', ['name', 'algorithm', 'board_size', 'ships', 'placement', 'path'])
+
+"""
+Class indexing the saved models of the model directories by algorithm, board size, fleet and placement mode.
+Models are loaded on first use and kept in an LRU cache, so switching between models or evaluating
+several models in one process pays for deserialization and the tensorflow graph only once per model.
+"""
+class ModelRegistry:
+    """
+    Constructor for a ModelRegistry object
+    Arguments:
+    directories = Directories searched for saved models (*.zip).
+    cache_size = Maximum number of loaded models kept in memory.
+    """
+    def __init__(self, directories=MODEL_DIRECTORIES, cache_size=4):
+        self.directories = directories
+        self.cache_size = cache_size
+        # Loaded models by path and modification time, the most recently used model is last
+        self.cache = OrderedDict()
+        self.entries = OrderedDict()
+        self.scan()
+
+    '''
+    Method indexing all saved models of the directories again, e.g. after a training run.
+    Zip files with names which can not be parsed (e.g. best_model.zip) can still be loaded by path,
+    files which are no zip files (e.g. an interrupted save) are skipped.
+    '''
+    def scan(self):
+        self.entries.clear()
+        for directory in self.directories:
+            for path in sorted(glob.glob(os.path.join(directory, '*.zip'))):
+                if not zipfile.is_zipfile(path):
+                    continue
+                entry = parse_model_name(path)
+                if entry is not None:
+                    self.entries[entry.name] = entry
+
+    '''
+    Method returning all models matching the given properties, properties which are None match every model.
+    algorithm: Name of the algorithm, e.g. 'ACKTR'
+    board_size: Number of fields in x and y direction
+    ships: List of the lengths of the ships
+    placement: Placement mode, e.g. 'Dynamic'
+    '''
+    def find(self, algorithm=None, board_size=None, ships=None, placement=None):
+        return [entry for entry in self.entries.values()
+                if (algorithm is None or entry.algorithm.lower() == algorithm.lower())
+                and (board_size is None or entry.board_size == board_size)
+                and (ships is None or entry.ships == tuple(ships))
+                and (placement is None or entry.placement.lower() == placement.lower())]
+
+    '''
+    Method returning a loaded model, from the cache if it has been loaded before.
+    name: Name of an indexed model, e.g. 'ACKTR_5x5_3_2_2_Dynamic', or path of a zip file
+    env: Optional environment set on the model, needed to continue training
+    algorithm: Name of the algorithm of a zip file which is not indexed, e.g. 'ACKTR'
+    numpy: Boolean whether the policy is loaded as NumpyPolicy, which predicts without tensorflow but can not be trained
+    seed: Optional seed of the random actions of the model, set on every call, also on a cached model
+    kwargs: Further arguments of the load method of the model, models loaded with other arguments are cached separately
+    '''
+    def load(self, name, env=None, algorithm=None, numpy=False, seed=None, **kwargs):
+        if name in self.entries:
+            path = self.entries[name].path
+            algorithm = self.entries[name].algorithm
+        else:
+            path = name
+            if algorithm is None:
+                entry = parse_model_name(path)
+                if entry is None:
+                    raise ValueError('Unknown model %s, the algorithm must be given' % name)
+                algorithm = entry.algorithm
+        # A model saved again, e.g. a new best model, is loaded from disk again
+        key = (os.path.abspath(path), os.path.getmtime(path), numpy, repr(sorted(kwargs.items())))
+        model = self.cache.get(key)
+        if model is None:
+            if numpy:
+                from NumpyPolicy import load_policy
+                model = load_policy(path, **kwargs)
+            else:
+                model = model_class(algorithm).load(path, env=env, **kwargs)
+            self.cache[key] = model
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(key)
+            if env is not None and not numpy:
+                model.set_env(env)
+        if seed is not None:
+            model.set_random_seed(seed)
+        return model
+
+    '''
+    Method loading a model by name or the first indexed model of an algorithm matching the config,
+    board size, ships and placement mode (static_placement) have to match.
+    algorithm: Name of the algorithm, e.g. 'ACKTR'
+    config: Configuration Object for the battleships game
+    name: Optional name or path of the model, overrides the search
+    kwargs: Further arguments of load
+    '''
+    def load_matching(self, algorithm, config, name=None, **kwargs):
+        if name is None:
+            placement = PLACEMENTS[bool(config.static_placement)]
+            entries = self.find(algorithm, config.board_size, config.ships, placement)
+            if not entries:
+                raise ValueError('No saved %s model for board size %d, ships %s and placement %s'
+                                 % (algorithm.upper(), config.board_size, list(config.ships), placement))
+            name = entries[0].name
+        return self.load(name, algorithm=algorithm, **kwargs)
+
+    '''
+    Method dropping all loaded models.
+    '''
+    def clear(self):
+        self.cache.clear()
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __iter__(self):
+        return iter(self.entries.values())
+
+    def __len__(self):
+        return len(self.entries)
+
+
+'''
+Method parsing the properties of a model from its file name.
+path: Path or name of the model, e.g. './ACKTR_Models/ACKTR_5x5_3_2_2_Dynamic.zip'
+return: ModelEntry or None if the name does not follow the naming scheme
+'''
+def parse_model_name(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    match = MODEL_NAME.match(name)
+    if match is None or match.group('rows') != match.group('columns'):
+        return None
+    # Fleets are the lengths of the ships separated by _, '3er' is the fleet of a single ship of length 3
+    fleet = match.group('fleet')
+    if fleet.endswith('er'):
+        fleet = fleet[:-2]
+    if not re.match(r'^\d+(_\d+)*$', fleet):
+        return None
+    ships = tuple(int(length) for length in fleet.split('_'))
+    return ModelEntry(name, match.group('algorithm').upper(), int(match.group('rows')), ships,
+                      match.group('placement'), path)
+
+'''
+Method returning the stable baselines class of an algorithm, stable baselines is only imported when a model is loaded.
+algorithm: Name of the algorithm, e.g. 'ACKTR'
+'''
+def model_class(algorithm):
+    stable_baselines = importlib.import_module('stable_baselines')
+    return getattr(stable_baselines, algorithm.upper())
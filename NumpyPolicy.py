@@ -0,0 +1,159 @@
+import json
+import zipfile
+
+import numpy as np
+
+# Names of the weights of the MlpPolicy networks in the saved models of stable baselines
+ACKTR_LAYERS = ('model/pi_fc0', 'model/pi_fc1')
+ACKTR_OUTPUT = 'model/pi'
+DQN_LAYERS = ('deepq/model/action_value/fully_connected', 'deepq/model/action_value/fully_connected_1')
+DQN_OUTPUT = 'deepq/model/action_value/fully_connected_2'
+
+"""
+Class running the forward pass of a trained MlpPolicy with numpy only, without tensorflow.
+The weights are read from the zip saved by stable baselines, the predict method has the same action selection
+as the models and works on single observations and batches, e.g. with evaluate or the policy server.
+Observations are cast to float and flattened like in the models.
+"""
+class NumpyPolicy:
+    """
+    Constructor for a NumpyPolicy object
+    Arguments:
+    layers = List of (weights, biases) of the hidden layers.
+    output = Tuple (weights, biases) of the output layer: logits (ACKTR) or action scores (DQN).
+    activation = Activation function of the hidden layers, e.g. np.tanh.
+    observation_shape = Shape of a single observation, e.g. (5, 5).
+    seed = Optional seed of the sampled actions.
+    """
+    def __init__(self, layers, output, activation, observation_shape, seed=None):
+        self.layers = [(np.asarray(weights, dtype=np.float32), np.asarray(biases, dtype=np.float32))
+                       for weights, biases in layers]
+        self.output = tuple(np.asarray(array, dtype=np.float32) for array in output)
+        self.activation = activation
+        self.observation_shape = tuple(observation_shape)
+        self.generator = np.random.default_rng(seed)
+
+    '''
+    Method restarting the random numbers of the sampled actions, like set_random_seed of the models.
+    seed: Optional seed, fresh entropy of the system if None
+    '''
+    def set_random_seed(self, seed):
+        self.generator = np.random.default_rng(seed)
+
+    '''
+    Method computing the outputs of the network for a batch of flat observations.
+    observations: Float array of shape (batch, inputs)
+    '''
+    def forward(self, observations):
+        latent = observations
+        for weights, biases in self.layers:
+            latent = self.activation(latent @ weights + biases)
+        weights, biases = self.output
+        return latent @ weights + biases
+
+    '''
+    Method choosing the actions of observations, like model.predict.
+    observation: Observation or batch of observations
+    deterministic: Boolean whether the best action is chosen instead of a sampled one
+    return: Actions and None as state
+    '''
+    def predict(self, observation, state=None, mask=None, deterministic=False):
+        observation = np.asarray(observation)
+        single = observation.shape == self.observation_shape
+        observations = observation.reshape(-1, int(np.prod(self.observation_shape))).astype(np.float32)
+        outputs = self.forward(observations)
+        if deterministic:
+            actions = np.argmax(outputs, axis=1)
+        else:
+            actions = self.sample(outputs)
+        return (actions[0] if single else actions), None
+
+    '''
+    Method sampling one action per row of logits with the Gumbel-max trick, like the categorical
+    distribution of stable baselines.
+    logits: Array of shape (batch, actions)
+    '''
+    def sample(self, logits):
+        uniform = self.generator.random(logits.shape, dtype=np.float32)
+        # Avoid log(0) for a uniform number of exactly 0
+        uniform = np.maximum(uniform, np.finfo(np.float32).tiny)
+        return np.argmax(logits - np.log(-np.log(uniform)), axis=1)
+
+    '''
+    Method returning the action probabilities of observations.
+    observation: Observation or batch of observations
+    '''
+    def action_probability(self, observation):
+        observation = np.asarray(observation)
+        outputs = self.forward(observation.reshape(-1, int(np.prod(self.observation_shape))).astype(np.float32))
+        probabilities = np.exp(outputs - outputs.max(axis=1, keepdims=True))
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return probabilities[0] if observation.shape == self.observation_shape else probabilities
+
+
+"""
+Class running the policy of a trained ACKTR model: tanh layers and the logits of the categorical distribution.
+Like ACKTR.predict, actions are sampled unless deterministic is set.
+"""
+class ACKTRNumpyPolicy(NumpyPolicy):
+    """
+    Constructor for an ACKTRNumpyPolicy object
+    Arguments:
+    parameters = Dict with the parameters of the saved model by name, e.g. 'model/pi_fc0/w:0'.
+    observation_shape = Shape of a single observation.
+    seed = Optional seed of the sampled actions.
+    """
+    def __init__(self, parameters, observation_shape, seed=None):
+        layers = [(parameters[name + '/w:0'], parameters[name + '/b:0']) for name in ACKTR_LAYERS]
+        output = (parameters[ACKTR_OUTPUT + '/w:0'], parameters[ACKTR_OUTPUT + '/b:0'])
+        super(ACKTRNumpyPolicy, self).__init__(layers, output, np.tanh, observation_shape, seed)
+
+
+"""
+Class running the policy of a trained DQN model: relu layers and the action scores of the q network.
+With a dueling network the state value and the mean action score shift all q values of an observation
+equally, so only the action scores are needed for the choice of the action.
+Like DQN.predict, the action with the highest q value is chosen unless deterministic is False,
+then the action is sampled from the softmax of the q values.
+"""
+class DQNNumpyPolicy(NumpyPolicy):
+    """
+    Constructor for a DQNNumpyPolicy object
+    Arguments:
+    parameters = Dict with the parameters of the saved model by name.
+    observation_shape = Shape of a single observation.
+    seed = Optional seed of the sampled actions.
+    """
+    def __init__(self, parameters, observation_shape, seed=None):
+        layers = [(parameters[name + '/weights:0'], parameters[name + '/biases:0']) for name in DQN_LAYERS]
+        output = (parameters[DQN_OUTPUT + '/weights:0'], parameters[DQN_OUTPUT + '/biases:0'])
+        super(DQNNumpyPolicy, self).__init__(layers, output, lambda latent: np.maximum(latent, 0),
+                                             observation_shape, seed)
+
+    def predict(self, observation, state=None, mask=None, deterministic=True):
+        return super(DQNNumpyPolicy, self).predict(observation, state, mask, deterministic)
+
+
+'''
+Method loading the policy of a model saved by stable baselines without tensorflow.
+path: Path of the zip file of an ACKTR or DQN model with MlpPolicy
+seed: Optional seed of the sampled actions
+'''
+def load_policy(path, seed=None):
+    if not zipfile.is_zipfile(path):
+        raise ValueError('%s is not a saved model' % path)
+    with zipfile.ZipFile(path) as archive:
+        data = json.loads(archive.read('data'))
+        parameter_list = json.loads(archive.read('parameter_list'))
+        with archive.open('parameters') as file:
+            arrays = np.load(file)
+            parameters = {name: arrays[name] for name in arrays.files}
+    missing = [name for name in parameter_list if name not in parameters]
+    if missing:
+        raise ValueError('Parameters %s are missing in %s' % (', '.join(missing), path))
+    observation_shape = tuple(data['observation_space']['shape'])
+    if ACKTR_OUTPUT + '/w:0' in parameters:
+        return ACKTRNumpyPolicy(parameters, observation_shape, seed)
+    if DQN_OUTPUT + '/weights:0' in parameters:
+        return DQNNumpyPolicy(parameters, observation_shape, seed)
+    raise ValueError('%s is not an ACKTR or DQN model with MlpPolicy' % path)
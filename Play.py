@@ -1,76 +1,171 @@
-import gym
-import gym_battleships
-import random
+import argparse
+import time
 
-from stable_baselines import ACKTR, DQN
-from stable_baselines.common.vec_env import DummyVecEnv
 from Config import Config
 # Config: First Argument: BoardSize, Second: Ships, Third: Ships placed with Gap or not
-from Result import Result
-
-# Inits config class
-config = Config(5, [3, 2, 2], True, False, False)
-
-# Inits Battleship gym environment
-envTmp = gym.make('Battleships-v0', config=config)
-
-#Wrap environment into a vector environment
-env = DummyVecEnv([lambda: envTmp])
-
-# Choose to display board
-print("Diplay board: Yes (1), No (0)")
-choiceRender = bool(int(input()))
-
-# Choose Model
-randomAgent = True
-print("Choose Agent: Radom (1), ACKTR (2), DQN (3)")
-choice = int(input())
-if choice == 2:
-    # Load ACKTR Model
-    model = ACKTR.load("./ACKTR_Models/ACKTR_5x5_3_2_2_Dynamic.zip", verbose=0, env=env)
-    # Disable Random Agent
-    randomAgent = False
-
-elif choice == 3:
-    # load DQN Model
-    model = DQN.load("./DQN_Models/DQN_5x5_3_2_2_Dynamic.zip", verbose=0, env=env)
-    # Disable Random Agent
-    randomAgent = False
-
-# Inits result Array
-results = []
-# Iteration: Amount of played Games
-for iteration in range(10):
-    score = 0
-    print('Iteration', iteration)
-    # Observed Player board
-    observation = env.reset()
-    # Init new Result
-    result = Result()
-    done = False
-    # Amount of moves used to finish the game
-    rounds = 0
-    while not done:
-        rounds += 1
-        # Get a random action from the action space
-        if randomAgent:
-            action = random.choice(env.envs[0].env.available_actions)
-        # Agent performs a step
-        if not randomAgent:
+from gym_battleships.envs import BattleshipsEnv
+from gym_battleships.envs.ObservationEncoder import OBSERVATION_ENCODINGS, get_observation_encoder
+from EpisodeRecorder import EpisodeRecorder
+from EpisodeLog import EpisodeLogWriter
+from Agents import RandomAgent, ProbabilityDensityAgent, PosteriorAgent
+from Evaluation import evaluate, print_statistics
+from ModelRegistry import MODEL_OBSERVATION_ENCODINGS
+
+"""
+Plays battleships games with an agent and prints the statistics of the games.
+All settings are command line arguments, stable baselines and tensorflow are only imported
+when a learned agent (ACKTR, DQN) is chosen, so the random and heuristic agents start right away.
+Example: python Play.py --agent density --games 1000
+         python Play.py --agent acktr --model ACKTR_5x5_3_2_2_Dynamic --render --games 3
+         python Play.py --agent dqn --numpy --games 1000
+         python Play.py --interactive
+"""
+
+# Agents in the order of the interactive menu
+AGENTS = ('random', 'acktr', 'dqn', 'density', 'posterior')
+
+
+'''
+Method parsing the command line arguments, asks for them with --interactive.
+Combinations of a learned agent and an observation encoding the saved models can not read are rejected.
+argv: Optional list of arguments, the arguments of the process otherwise
+'''
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='Play battleships games with an agent')
+    parser.add_argument('--agent', choices=AGENTS, default='random', help='Agent playing the games')
+    parser.add_argument('--model', help='Name of an indexed model (e.g. ACKTR_5x5_3_2_2_Dynamic) or path of a zip, '
+                                        'by default the first saved model matching algorithm, board size and ships')
+    parser.add_argument('--numpy', action='store_true',
+                        help='Run the learned model with numpy only, without stable baselines and tensorflow')
+    parser.add_argument('--games', type=int, default=10, help='Amount of games')
+    parser.add_argument('--render', action='store_true', help='Display the board, the games are played one by one')
+    parser.add_argument('--batch-size', type=int, default=64,
+                        help='Games in flight without display, predicted with one call per step')
+    parser.add_argument('--log-path', help='Optional directory to stream the games into an episode log on disk')
+    parser.add_argument('--board-size', type=int, default=5, help='Value of Config.board_size')
+    parser.add_argument('--ships', type=int, nargs='+', default=[3, 2, 2], help='Value of Config.ships')
+    parser.add_argument('--gap', type=int, default=1, help='Value of Config.gap')
+    parser.add_argument('--static', type=int, default=0, help='Value of Config.static_placement')
+    parser.add_argument('--binary', type=int, default=0, help='Value of Config.binary_reward')
+    parser.add_argument('--observation-encoding', choices=OBSERVATION_ENCODINGS, default='int',
+                        help='Value of Config.observation_encoding, the learned agents need %s'
+                             % ' or '.join(MODEL_OBSERVATION_ENCODINGS))
+    parser.add_argument('--seed', type=int, help='Optional seed of the games')
+    parser.add_argument('--interactive', action='store_true', help='Ask for display, agent and amount of games')
+    arguments = parser.parse_args(argv)
+    if arguments.interactive:
+        ask_arguments(arguments)
+    if arguments.agent in ('acktr', 'dqn') and arguments.observation_encoding not in MODEL_OBSERVATION_ENCODINGS:
+        parser.error('the saved models of --agent %s need --observation-encoding %s'
+                     % (arguments.agent, ' or '.join(MODEL_OBSERVATION_ENCODINGS)))
+    return arguments
+
+'''
+Method asking for the display, the agent and the amount of games, like earlier versions of Play.py.
+arguments: Parsed arguments, updated with the answers
+'''
+def ask_arguments(arguments):
+    # Choose to display board
+    print("Diplay board: Yes (1), No (0)")
+    arguments.render = bool(int(input()))
+    # Choose Model, the random agent shoots random fields which have not been shot yet
+    print("Choose Agent: Radom (1), ACKTR (2), DQN (3), Probability density (4), Posterior sampling (5)")
+    arguments.agent = AGENTS[int(input()) - 1]
+    # Without display many games can be played fast, choose how many
+    if not arguments.render:
+        print("Amount of games (Enter for %d)" % arguments.games)
+        answer = input()
+        if answer:
+            arguments.games = int(answer)
+    return arguments
+
+'''
+Method creating the agent of the arguments.
+arguments: Parsed arguments
+config: Configuration Object for the battleships game
+fieldEncoding: Encoding of the radar board
+'''
+def create_agent(arguments, config, fieldEncoding):
+    if arguments.agent == 'random':
+        return RandomAgent(fieldEncoding['W'], seed=arguments.seed,
+                           observation_encoder=get_observation_encoder(config.observation_encoding, config.board_size))
+    if arguments.agent == 'density':
+        # Heuristic agent shooting the field covered by most legal placements of the remaining ships
+        return ProbabilityDensityAgent(config, fieldEncoding, seed=arguments.seed)
+    if arguments.agent == 'posterior':
+        # Agent shooting the field most likely occupied in layouts sampled consistent with the radar
+        return PosteriorAgent(config, fieldEncoding, seed=arguments.seed)
+
+    # Learned agents, stable baselines and tensorflow are imported when the model is loaded,
+    # the numpy policy only reads the weights of the saved model
+    from ModelRegistry import ModelRegistry
+    if arguments.numpy:
+        return ModelRegistry().load_matching(arguments.agent, config, arguments.model, numpy=True,
+                                             seed=arguments.seed)
+    return ModelRegistry().load_matching(arguments.agent, config, arguments.model, verbose=0)
+
+'''
+Method playing the games of the arguments.
+argv: Optional list of arguments, the arguments of the process otherwise
+'''
+def main(argv=None):
+    arguments = parse_arguments(argv)
+
+    # Inits config class
+    config = Config(arguments.board_size, arguments.ships, bool(arguments.gap), bool(arguments.static),
+                    bool(arguments.binary), observation_encoding=arguments.observation_encoding)
+
+    # Inits Battleship gym environment, used to display the games
+    env = BattleshipsEnv(config)
+    if arguments.seed is not None:
+        env.seed(arguments.seed)
+
+    model = create_agent(arguments, config, env.fieldEncoding)
+
+    # Records the steps of all games, in memory or in the episode log
+    if arguments.log_path:
+        recorder = EpisodeLogWriter(arguments.log_path, config.board_size)
+    else:
+        recorder = EpisodeRecorder(config.board_size)
+
+    # Without display the games are played in a batched environment: the observations of all games
+    # in flight are stacked into one predict call per step and a new game is started on a board
+    # as soon as its game has finished
+    if not arguments.render:
+        start = time.perf_counter()
+        result = evaluate(model, config, arguments.games, n_envs=arguments.batch_size, recorder=recorder,
+                          seed=arguments.seed)
+        duration = time.perf_counter() - start
+        print_statistics(result)
+        print("Played", arguments.games, "games in", round(duration, 2), "s,",
+              round(arguments.games / duration, 1), "games/s")
+
+    # Iteration: Games played one by one to display them
+    for iteration in range(arguments.games if arguments.render else 0):
+        score = 0
+        print('Iteration', iteration)
+        # Observed Player board
+        observation = env.reset()
+        done = False
+        # Amount of moves used to finish the game
+        rounds = 0
+        while not done:
+            rounds += 1
+            # Agent performs a step
             action, _states = model.predict(observation)
-        nextObservation, reward, done, info = env.step(action)
-        # Renders the Game state with radar board
-        if choiceRender:
+            observation, reward, done, info = env.step(int(action))
+            # Renders the Game state with radar board
             env.render()
-        score += reward
-        # Add step to result Object
-        result.append_history(rounds, action, nextObservation, reward, done, info)
-        observation = nextObservation
-        # Game is done
-        if done:
-            print("End of game: Rounds", rounds, "Score", score)
-            # Store amount of rounds in result object
-            result.set_rounds(rounds)
-            # Add current result object to all results
-            results.append(result)
-print('Finished')
+            score += reward
+            # Add step to the recorder, the game is closed when done
+            recorder.append_step(action, env.radar, reward, done, info)
+            # Game is done
+            if done:
+                print("End of game: Rounds", rounds, "Score", score)
+    if arguments.log_path:
+        recorder.close()
+    print('Finished')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+import argparse
+import os
+import selectors
+import socket
+import struct
+import time
+
+import numpy as np
+
+from Config import Config
+from gym_battleships.envs.ObservationEncoder import OBSERVATION_ENCODINGS, get_observation_encoder
+
+# Header of a request: number of boards, followed by their observations
+REQUEST_HEADER = struct.Struct('<I')
+
+"""
+Class serving the predictions of one agent to many game clients over a Unix socket.
+Requests of all clients which arrive within the latency budget are stacked into a single predict call,
+so the model runs on large batches instead of one small board per call.
+A request is the number of boards (uint32, at most max_batch) followed by their observations in the encoding
+of the config, the reply is one int32 action per board. Clients sending larger requests are disconnected.
+The server runs in a single thread, e.g. in its own process.
+Example: python PolicyServer.py --model ACKTR_5x5_3_2_2_Dynamic --socket /tmp/battleships.sock
+"""
+class PolicyServer:
+    """
+    Constructor for a PolicyServer object
+    Arguments:
+    agent = Model or agent with a predict method like the stable baselines models.
+    config = Configuration Object for the battleships game, sets shape and type of the observations.
+    path = Path of the Unix socket, an existing socket file is replaced.
+    latency_budget = Seconds a request waits at most for requests of other clients before the batch is predicted.
+    max_batch = Number of boards which are predicted at once without waiting for the latency budget.
+    deterministic = Optional deterministic flag passed on to predict.
+    """
+    def __init__(self, agent, config, path, latency_budget=0.002, max_batch=1024, deterministic=None):
+        self.agent = agent
+        self.path = path
+        self.latency_budget = latency_budget
+        self.max_batch = max_batch
+        self.kwargs = {} if deterministic is None else {'deterministic': deterministic}
+        encoder = get_observation_encoder(config.observation_encoding, config.board_size)
+        self.observation_shape = encoder.shape
+        self.observation_dtype = encoder.dtype
+        self.observation_bytes = int(np.prod(self.observation_shape)) * self.observation_dtype.itemsize
+
+        if os.path.exists(path):
+            os.remove(path)
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.bind(path)
+        self.socket.listen()
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.socket, selectors.EVENT_READ)
+
+        # Requests waiting for the next batch: connection and observations
+        self.pending = []
+        self.pending_boards = 0
+        # Connections with pending requests, a client may send several requests before it reads the replies
+        self.pending_connections = set()
+        self.deadline = None
+        # Number of connected clients
+        self.clients = 0
+        # Number of predict calls and predicted boards, the mean batch size is boards / batches
+        self.batches = 0
+        self.boards = 0
+        self.closed = False
+
+    '''
+    Method serving requests until the server is closed.
+    '''
+    def serve_forever(self):
+        while not self.closed:
+            self.serve_once()
+
+    '''
+    Method waiting for requests until the next batch is due and predicting it.
+    A batch is due when the latency budget of its first request is used up, when it holds max_batch boards
+    or when every connected client waits for a reply, so a single client does not wait for the budget.
+    timeout: Seconds to wait for requests if none are pending, forever if None
+    '''
+    def serve_once(self, timeout=None):
+        if self.pending:
+            timeout = max(self.deadline - time.perf_counter(), 0)
+        for key, _ in self.selector.select(timeout):
+            if key.data is None:
+                self.accept()
+            else:
+                self.read(key.fileobj, key.data)
+        if self.pending and (self.pending_boards >= self.max_batch or len(self.pending_connections) >= self.clients
+                             or time.perf_counter() >= self.deadline):
+            self.flush()
+
+    # Registers a new client connection with an empty receive buffer
+    def accept(self):
+        connection, _ = self.socket.accept()
+        self.selector.register(connection, selectors.EVENT_READ, bytearray())
+        self.clients += 1
+
+    '''
+    Method reading from a client connection and queueing all complete requests.
+    connection: Socket of the client
+    buffer: Received bytes which do not form a complete request yet
+    '''
+    def read(self, connection, buffer):
+        data = connection.recv(1 << 20)
+        if not data:
+            self.disconnect(connection)
+            return
+        buffer += data
+        while len(buffer) >= REQUEST_HEADER.size:
+            count, = REQUEST_HEADER.unpack_from(buffer)
+            if count > self.max_batch:
+                # The observations of the request are not buffered, the client is dropped instead
+                self.disconnect(connection)
+                return
+            size = REQUEST_HEADER.size + count * self.observation_bytes
+            if len(buffer) < size:
+                break
+            observations = np.frombuffer(bytes(buffer[REQUEST_HEADER.size:size]), dtype=self.observation_dtype)
+            del buffer[:size]
+            if not self.pending:
+                self.deadline = time.perf_counter() + self.latency_budget
+            self.pending.append((connection, observations.reshape((count,) + self.observation_shape)))
+            self.pending_boards += count
+            self.pending_connections.add(connection)
+
+    '''
+    Method closing a client connection and dropping its pending requests.
+    connection: Socket of the client
+    '''
+    def disconnect(self, connection):
+        self.selector.unregister(connection)
+        connection.close()
+        self.clients -= 1
+        if connection in self.pending_connections:
+            self.pending = [(other, observations) for other, observations in self.pending if other is not connection]
+            self.pending_boards = sum(len(observations) for _, observations in self.pending)
+            self.pending_connections.discard(connection)
+
+    '''
+    Method predicting all pending requests in one batch and sending the actions to the clients.
+    '''
+    def flush(self):
+        pending = self.pending
+        self.pending = []
+        self.pending_boards = 0
+        self.pending_connections.clear()
+        observations = np.concatenate([observations for _, observations in pending])
+        actions, _states = self.agent.predict(observations, **self.kwargs)
+        actions = np.asarray(actions, dtype='<i4').reshape(-1)
+        self.batches += 1
+        self.boards += len(actions)
+        start = 0
+        for connection, request in pending:
+            end = start + len(request)
+            try:
+                connection.sendall(actions[start:end].tobytes())
+            except OSError:
+                # The client is gone, its connection is closed on the next read
+                pass
+            start = end
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for key in list(self.selector.get_map().values()):
+            key.fileobj.close()
+        self.selector.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+"""
+Class sending the observations of a game client to a PolicyServer.
+Has the predict method of the stable baselines models, so it can be used like a model, e.g. with evaluate.
+"""
+class PolicyClient:
+    """
+    Constructor for a PolicyClient object
+    Arguments:
+    path = Path of the Unix socket of the server.
+    config = Configuration Object for the battleships game, must be the one of the server.
+    max_batch = Maximum number of boards per request, at most the max_batch of the server.
+    """
+    def __init__(self, path, config, max_batch=1024):
+        self.max_batch = max_batch
+        encoder = get_observation_encoder(config.observation_encoding, config.board_size)
+        self.observation_shape = encoder.shape
+        self.observation_dtype = encoder.dtype
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(path)
+
+    '''
+    Method requesting the actions of observations from the server.
+    observation: Observation or batch of observations
+    deterministic: Ignored, the server decides whether its predictions are deterministic
+    return: Actions and None as state, like model.predict
+    '''
+    def predict(self, observation, state=None, mask=None, deterministic=False):
+        observation = np.ascontiguousarray(observation, dtype=self.observation_dtype)
+        single = observation.shape == self.observation_shape
+        observations = observation.reshape((-1,) + self.observation_shape)
+        # Larger batches are sent as several requests, the replies arrive in the same order
+        for start in range(0, len(observations), self.max_batch):
+            chunk = observations[start:start + self.max_batch]
+            self.socket.sendall(REQUEST_HEADER.pack(len(chunk)) + chunk.tobytes())
+        reply = receive(self.socket, len(observations) * 4)
+        actions = np.frombuffer(reply, dtype='<i4').astype('int')
+        return (actions[0] if single else actions), None
+
+    def close(self):
+        self.socket.close()
+
+
+'''
+Method receiving an exact number of bytes from a socket.
+connection: Socket to receive from
+size: Number of bytes
+'''
+def receive(connection, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError('Policy server closed the connection')
+        data += chunk
+    return bytes(data)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the predictions of an agent to many game clients')
+    parser.add_argument('--agent', choices=('acktr', 'dqn', 'density', 'random'), default='acktr',
+                        help='Agent serving the predictions')
+    parser.add_argument('--model', help='Name of an indexed model or path of a zip, '
+                                        'by default the first saved model matching algorithm, board size and ships')
+    parser.add_argument('--numpy', action='store_true',
+                        help='Run the learned model with numpy only, without stable baselines and tensorflow')
+    parser.add_argument('--socket', default='/tmp/battleships.sock', help='Path of the Unix socket')
+    parser.add_argument('--latency-budget', type=float, default=2.0,
+                        help='Milliseconds a request waits at most for requests of other clients')
+    parser.add_argument('--max-batch', type=int, default=1024, help='Boards predicted at once without waiting')
+    parser.add_argument('--deterministic', action='store_true', help='Predict deterministic actions')
+    parser.add_argument('--board-size', type=int, default=5, help='Value of Config.board_size')
+    parser.add_argument('--ships', type=int, nargs='+', default=[3, 2, 2], help='Value of Config.ships')
+    parser.add_argument('--gap', type=int, default=1, help='Value of Config.gap')
+    parser.add_argument('--static', type=int, default=0,
+                        help='Value of Config.static_placement, selects the SingleShot models')
+    parser.add_argument('--observation-encoding', choices=OBSERVATION_ENCODINGS, default='int',
+                        help='Value of Config.observation_encoding')
+    arguments = parser.parse_args()
+    if arguments.agent in ('acktr', 'dqn'):
+        from ModelRegistry import MODEL_OBSERVATION_ENCODINGS
+        if arguments.observation_encoding not in MODEL_OBSERVATION_ENCODINGS:
+            parser.error('the saved models of --agent %s need --observation-encoding %s'
+                         % (arguments.agent, ' or '.join(MODEL_OBSERVATION_ENCODINGS)))
+
+    config = Config(arguments.board_size, arguments.ships, bool(arguments.gap), bool(arguments.static), False,
+                    observation_encoding=arguments.observation_encoding)
+    if arguments.agent in ('acktr', 'dqn'):
+        # Stable baselines is only imported for the learned agents
+        from ModelRegistry import ModelRegistry
+        if arguments.numpy:
+            agent = ModelRegistry().load_matching(arguments.agent, config, arguments.model, numpy=True)
+        else:
+            agent = ModelRegistry().load_matching(arguments.agent, config, arguments.model, verbose=0)
+    elif arguments.agent == 'density':
+        from Agents import ProbabilityDensityAgent
+        agent = ProbabilityDensityAgent(config)
+    else:
+        from Agents import RandomAgent
+        agent = RandomAgent(observation_encoder=get_observation_encoder(config.observation_encoding,
+                                                                        config.board_size))
+
+    server = PolicyServer(agent, config, arguments.socket, arguments.latency_budget / 1000, arguments.max_batch,
+                          arguments.deterministic or None)
+    print('Serving', arguments.agent, 'on', arguments.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print('Predicted', server.boards, 'boards in', server.batches, 'batches')
+        server.close()
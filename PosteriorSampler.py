@@ -0,0 +1,171 @@
+import numpy as np
+
+from gym_battleships.envs.ShipPlacer import get_ship_placer, pack_fields
+
+"""
+Class sampling complete enemy layouts which are consistent with a radar board.
+Layouts are drawn like BattleshipsEnv.place_ships (ship by ship, uniform among the legal placements),
+but only among placements allowed by the radar. Every sample carries the importance weight of this restriction,
+so the weighted samples follow the posterior of the layouts given all misses, hits and sunken ships.
+The sampler is incremental: after a shot the existing samples are filtered with the new radar
+and only the missing samples are drawn again.
+"""
+class PosteriorSampler:
+    """
+    Constructor for a PosteriorSampler object
+    Arguments:
+    config = Configuration Object for the battleships game.
+    n_samples = Number of layouts kept in the sample set.
+    fieldEncoding = Encoding of the radar board, like BattleshipsEnv.fieldEncoding.
+    batch_size = Number of layouts proposed at once when samples are drawn.
+    max_batches = Maximum number of batches drawn per update, limits the time per shot late in a game.
+    hit_boost = Proposal weight of a placement per hit or sunken field it covers, so fewer proposals are rejected.
+    seed = Optional seed of the sampled layouts, an int or a numpy SeedSequence.
+    """
+    def __init__(self, config, n_samples=1000, fieldEncoding=None, batch_size=256, max_batches=20, hit_boost=20,
+                 seed=None):
+        if fieldEncoding is None:
+            fieldEncoding = {'W': 0, 'X': 1, '#': 2, '0': -1}
+        self.fieldEncoding = fieldEncoding
+        self.board_size = config.board_size
+        self.n_samples = n_samples
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.hit_boost = hit_boost
+        self.generator = np.random.default_rng(seed)
+        self.placer = get_ship_placer(config)
+        self.tables = self.placer.tables
+        # Fields of every placement as boolean matrix, to count the shot ship fields a placement covers
+        fields = self.board_size * self.board_size
+        self.ship_fields = [np.unpackbits(table.ship_mask.view(np.uint8), axis=1, bitorder='little')[:, :fields]
+                            for table in self.tables]
+        self.reset()
+
+    '''
+    Method starting a new game, the samples are drawn from the prior of the empty radar board.
+    '''
+    def reset(self):
+        self.placements = np.zeros((0, len(self.tables)), dtype='int')
+        self.occupied = np.zeros((0, self.placer.words), dtype=np.uint64)
+        self.log_weights = np.zeros(0)
+        self.update(np.full((self.board_size, self.board_size), self.fieldEncoding['W']))
+
+    '''
+    Method adapting the samples to a radar board.
+    Samples which contradict the radar are dropped, new samples are drawn if less than half are left.
+    radar: Radar board of the game
+    '''
+    def update(self, radar):
+        radar = np.asarray(radar).ravel()
+        hit_fields = radar == self.fieldEncoding['X']
+        sunken_fields = radar == self.fieldEncoding['#']
+        hit = pack_fields(hit_fields)
+        sunken = pack_fields(sunken_fields)
+        miss = pack_fields(radar == self.fieldEncoding['0'])
+        # Every hit and sunken field must be covered by a ship of a layout
+        self.required = hit | sunken
+        # Placements a ship can have: no missed field, sunken fields only as a whole sunken ship
+        # and not only hit fields, because such a ship would be sunken already
+        self.allowed = []
+        self.proposal_weights = []
+        for table, ship_fields in zip(self.tables, self.ship_fields):
+            covers_miss = (table.ship_mask & miss).any(axis=1)
+            covers_sunken = (table.ship_mask & sunken).any(axis=1)
+            in_sunken = ~(table.ship_mask & ~sunken).any(axis=1)
+            in_hit = ~(table.ship_mask & ~hit).any(axis=1)
+            self.allowed.append(~covers_miss & (~covers_sunken | in_sunken) & ~in_hit)
+            self.proposal_weights.append(1.0 + self.hit_boost * (ship_fields @ (hit_fields | sunken_fields)))
+
+        # Filter the existing samples
+        keep = self.consistent(self.placements, self.occupied)
+        self.placements = self.placements[keep]
+        self.occupied = self.occupied[keep]
+        self.log_weights = self.log_weights[keep]
+
+        if len(self.placements) < self.n_samples // 2:
+            self.draw(self.n_samples - len(self.placements))
+
+    '''
+    Method checking which layouts are consistent with the radar of the last update.
+    placements: Array with the placement index of every ship per layout
+    occupied: Bitmasks of the occupied fields per layout
+    '''
+    def consistent(self, placements, occupied):
+        keep = ~(self.required & ~occupied).any(axis=1)
+        for ship_index, allowed in enumerate(self.allowed):
+            keep &= allowed[placements[:, ship_index]]
+        return keep
+
+    '''
+    Method drawing new layouts consistent with the radar.
+    Each ship is placed among its compatible and allowed placements, preferring placements through shot ships.
+    The importance weight corrects for the placements left out and the preference compared to the
+    uniform placement of BattleshipsEnv.place_ships.
+    count: Number of layouts to draw
+    '''
+    def draw(self, count):
+        placements = [self.placements]
+        occupied = [self.occupied]
+        log_weights = [self.log_weights]
+        drawn = 0
+        for _ in range(self.max_batches):
+            if drawn >= count:
+                break
+            batch_placements = np.zeros((self.batch_size, len(self.tables)), dtype='int')
+            batch_occupied = np.zeros((self.batch_size, self.placer.words), dtype=np.uint64)
+            batch_log_weights = np.zeros(self.batch_size)
+            placed = np.ones(self.batch_size, dtype=bool)
+            for ship_index, table in enumerate(self.tables):
+                compatible = ~(table.forbidden_mask[None, :, :] & batch_occupied[:, None, :]).any(axis=2)
+                proposal = (compatible & self.allowed[ship_index]) * self.proposal_weights[ship_index]
+                cumulative = np.cumsum(proposal, axis=1)
+                total = cumulative[:, -1]
+                placed &= total > 0
+                # Draw a placement with probability proportional to its proposal weight
+                uniform = self.generator.random(self.batch_size)
+                placement = (cumulative <= uniform[:, None] * total[:, None]).sum(axis=1)
+                placement = np.minimum(placement, len(table) - 1)
+                # Uniform probability of the placement divided by its proposal probability
+                chosen = np.maximum(proposal[np.arange(self.batch_size), placement], 1e-12)
+                batch_log_weights += np.log(np.maximum(total, 1e-12)) - np.log(np.maximum(compatible.sum(axis=1), 1))
+                batch_log_weights -= np.log(chosen)
+                batch_occupied |= table.ship_mask[placement]
+                batch_placements[:, ship_index] = placement
+            keep = placed & ~(self.required & ~batch_occupied).any(axis=1)
+            keep = np.flatnonzero(keep)[:count - drawn]
+            placements.append(batch_placements[keep])
+            occupied.append(batch_occupied[keep])
+            log_weights.append(batch_log_weights[keep])
+            drawn += len(keep)
+        self.placements = np.concatenate(placements)
+        self.occupied = np.concatenate(occupied)
+        self.log_weights = np.concatenate(log_weights)
+
+    '''
+    Method returning the normalized weights of the samples.
+    '''
+    def weights(self):
+        if not len(self.log_weights):
+            return self.log_weights
+        weights = np.exp(self.log_weights - self.log_weights.max())
+        return weights / weights.sum()
+
+    '''
+    Effective number of samples, low values mean that few samples dominate the estimate.
+    '''
+    @property
+    def effective_sample_size(self):
+        weights = self.weights()
+        return 1 / np.sum(weights ** 2) if len(weights) else 0.0
+
+    '''
+    Method returning the probability of every field to be occupied by a ship.
+    Shot fields are 1 if a ship was hit and 0 otherwise. Without samples all fields are 0.
+    '''
+    def probabilities(self):
+        fields = self.board_size * self.board_size
+        occupied = np.unpackbits(self.occupied.view(np.uint8), axis=1, bitorder='little')[:, :fields]
+        return (self.weights() @ occupied).reshape(self.board_size, self.board_size)
+
+    def __len__(self):
+        return len(self.placements)
@@ -0,0 +1,64 @@
+from stable_baselines.common.callbacks import BaseCallback
+
+from gym_battleships.envs.Profiler import merge_stats
+
+"""
+Callback writing the time spent in each phase of the battleships games to the tensorboard log of the model.
+Needs an environment with profiling enabled in the config, e.g. Config(5, [3, 2, 2], True, False, False, profile=True).
+Per phase the share of the environment time, the mean time per call and the calls per step are logged.
+"""
+class ProfilingCallback(BaseCallback):
+    """
+    Constructor for a profiling callback object
+    Arguments:
+    log_freq = Number of steps between two logs, the measurements are cleared after each log.
+    verbose = Print the breakdown on every log if > 0.
+    """
+    def __init__(self, log_freq=1000, verbose=0):
+        super(ProfilingCallback, self).__init__(verbose)
+        self.log_freq = log_freq
+        self.last_timesteps = 0
+
+    '''
+    Method collecting the measurements of all environments of the training environment.
+    '''
+    def collect(self):
+        # Batched battleships environments merge their workers, other vector environments are asked per environment
+        if hasattr(self.training_env, 'profile_stats'):
+            return self.training_env.profile_stats(reset=True)
+        return merge_stats(self.training_env.env_method('profile_stats', reset=True))
+
+    def _on_step(self):
+        if self.n_calls % self.log_freq != 0:
+            return True
+        stats = self.collect()
+        steps = max(self.num_timesteps - self.last_timesteps, 1)
+        self.last_timesteps = self.num_timesteps
+        # Time spent in the environment: steps and resets of single games, batched steps include the resets
+        if 'step_wait' in stats:
+            total = stats['step_wait']['time']
+        else:
+            total = sum(stats[phase]['time'] for phase in ('step', 'set_up') if phase in stats)
+
+        writer = self.locals.get('writer')
+        if writer is not None:
+            # Tensorflow is only needed when the breakdown is written
+            import tensorflow as tf
+            summaries = []
+            for phase, values in stats.items():
+                summaries.append(tf.Summary.Value(tag='profile/%s_mean_us' % phase, simple_value=values['mean_us']))
+                summaries.append(tf.Summary.Value(tag='profile/%s_calls_per_step' % phase,
+                                                  simple_value=values['calls'] / steps))
+                if total:
+                    summaries.append(tf.Summary.Value(tag='profile/%s_time_share' % phase,
+                                                      simple_value=values['time'] / total))
+                if 'allocated_blocks' in values:
+                    summaries.append(tf.Summary.Value(tag='profile/%s_allocated_blocks' % phase,
+                                                      simple_value=values['allocated_blocks']))
+            writer.add_summary(tf.Summary(value=summaries), self.num_timesteps)
+
+        if self.verbose > 0:
+            for phase, values in sorted(stats.items(), key=lambda item: -item[1]['time']):
+                print('Profile', phase, 'calls', values['calls'], 'mean %.1fus' % values['mean_us'],
+                      'share %.2f' % (values['time'] / total if total else 0.0))
+        return True
@@ -5,3 +5,9 @@ register(
     entry_point='gym_battleships.envs:BattleshipsEnv',
     max_episode_steps=100000
 )
+
+register(
+    id='BattleshipsSparse-v0',
+    entry_point='gym_battleships.envs:SparseBattleshipsEnv',
+    max_episode_steps=100000000
+)
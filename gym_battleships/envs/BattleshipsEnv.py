@@ -1,17 +1,24 @@
-from copy import deepcopy
-from random import randint, getrandbits
-
 import gym
 from gym import spaces
 import numpy as np
-from .Ship import Ship
+from .Fleet import Fleet
+from .ShipPlacer import get_ship_placer
+from .LayoutPool import LayoutPool
+from .Profiler import Profiler
+from .Renderer import Renderer
+from .ObservationEncoder import get_observation_encoder
+from .RandomStream import RandomStream
+
+# Phases of a game measured if profiling is enabled in the config
+PROFILED_PHASES = ('step', 'shoot', 'check_done', 'calculate_reward', 'build_info', 'set_up',
+                   'draw_ships', 'place_ships')
 
 """
 Class representing the Battleship gym environment
 """
 class BattleshipsEnv(gym.Env):
   """Custom Environment that follows gym interface"""
-  metadata = {'render.modes': ['human']}
+  metadata = {'render.modes': ['human', 'ansi', 'rgb_array']}
 
   """
   Constructor for the battleships OpenAi gym environment
@@ -26,22 +33,43 @@ class BattleshipsEnv(gym.Env):
     self.gap = config.gap
     self.binary_reward = config.binary_reward
 
+    # How the info dict of a step is built ('full', 'reuse' or 'none')
+    self.info_mode = config.info_mode
+    # Info dict reused on every step if info_mode is 'reuse'
+    self.info = {}
+
     self.static_placement = config.static_placement
     self.placement = None
     self.placement_ships = None
+    self.placement_ship_board = None
 
     # The player board "radar" where he registers his shots.
     self.radar = []
 
-    # List containing all valid actions (action get removed after beeing used/shot once)
-    self.available_actions = []
+    # Observation of the radar board in the encoding of the config, the radar board itself for 'int' and 'int8'
+    self.observation = []
 
-    # List containing the ships objects of the enemy
-    self.enemyShips = []
+    # Boolean mask of all valid actions (action gets disabled after beeing used/shot once)
+    self.valid_actions = []
+
+    # Fleet containing the ships of the enemy, ships are placed in the order of config.ships
+    self.enemyShips = Fleet(config.ships)
 
     # The enemy board where the ships of the enemy are placed
     self.enemy_board = []
 
+    # Board with the index of the enemy ship placed on each field, -1 for water
+    self.ship_board = []
+
+    # Number of enemy ships which are not sunken yet
+    self.ships_afloat = 0
+
+    # Number of fields per state on the radar board, updated on every shot
+    self.miss_count = 0
+    self.hit_count = 0
+    self.empty_count = 0
+    self.sunken_count = 0
+
     """
     FieldEncoding to map the state to more human readable content.
     Water:0
@@ -51,14 +79,39 @@ class BattleshipsEnv(gym.Env):
     """
     self.fieldEncoding = {'W': 0, 'X': 1, '#': 2, '0': -1}
 
+    # Renders the radar board with lookup tables of the field encoding
+    self.renderer = Renderer(self.fieldEncoding)
+
     # Set the available ships to place
     self.ships = config.ships
 
     # Set the size of the board
     self.board_size = config.board_size
 
+    # Placement tables of the ships, shared by all environments with the same config
+    self.ship_placer = self.create_ship_placer(config)
+
+    # Encoder keeping the observation up to date on every shot
+    self.observation_encoder = self.create_observation_encoder(config)
+
+    # Optional pool of pre-generated layouts, given as path of the layout file or as LayoutPool object
+    self.layout_pool = config.layout_pool
+    if isinstance(self.layout_pool, str):
+      self.layout_pool = LayoutPool(self.layout_pool)
+    if self.layout_pool is not None and not self.layout_pool.matches(config):
+      raise ValueError('Layout pool does not match board size, ships and gap of the config')
+
     self.steps = 0
 
+    # Random numbers of this environment, reproducible after seed()
+    self.random = RandomStream()
+
+    # Optional profiler, the measured methods are only wrapped if profiling is enabled
+    self.profiler = None
+    if config.profile:
+      self.profiler = Profiler(config.profile == 'allocations')
+      self.profiler.instrument(self, PROFILED_PHASES)
+
     # Set up the game for a new round
     self.set_up()
 
@@ -66,9 +119,8 @@ class BattleshipsEnv(gym.Env):
     self.action_space = spaces.Discrete(self.board_size * self.board_size)
 
     # Allocate oberservations (Each field has a state and can be observed.
-    # Possible states are Integer values of fieldEncoding => low=-1, high=2)
-    self.observation_space = spaces.Box(low=-1, high=2, shape=(self.board_size, self.board_size),
-                                        dtype=np.int)
+    # Possible states are Integer values of fieldEncoding => low=-1, high=2, other encodings have their own space)
+    self.observation_space = self.observation_encoder.space()
 
   '''
   Step function for OpenAi gym.
@@ -84,45 +136,28 @@ class BattleshipsEnv(gym.Env):
     reward = 0
 
     #Check if x, y allready have been shot.
-    if (x, y) not in self.available_actions:
+    if not self.valid_actions[x * self.board_size + y]:
 
       double_shot_reward = -1000
 
       if self.binary_reward:
         double_shot_reward = -1
 
-      return self.radar, double_shot_reward, True, {
-        'miss_count': 0,
-        'hit_count': 0,
-        'empty_count': 0,
-        'sunken_count': 0
-      }
+      return self.observation, double_shot_reward, True, self.build_info(0, 0, 0, 0)
 
       # Add negative reward for shooting a forbidden field
       #reward -= 2 * self.board_size
 
-      # Get a random index of available actions
-      random_index = np.random.randint(0, len(self.available_actions))
-
-      # Get x,y coordinates from a random valid available action
-      #x, y = self.available_actions[random_index]
-
     # Shoot coordinates
     hit = self.shoot(x, y)
 
     self.steps += 1
 
     # Evaluate result of shot
-    after_shot_state = self.radar
-    miss_after_shot, hit_after_shot, empty_after_shot, sunken_prev_shot = self.count_states(after_shot_state)
+    after_shot_state = self.observation
 
     # Add count information to info, for debug and possible calculations of statistics
-    info = {
-      'miss_count': miss_after_shot,
-      'hit_count': hit_after_shot,
-      'empty_count': empty_after_shot,
-      'sunken_count': sunken_prev_shot
-    }
+    info = self.build_info(self.miss_count, self.hit_count, self.empty_count, self.sunken_count)
 
     # Check if game is done
     done = self.check_done()
@@ -135,99 +170,133 @@ class BattleshipsEnv(gym.Env):
 
     return after_shot_state, reward, done, info
 
-  # OpenAI gym reset method. Gets called to set up a new game.
-  def reset(self):
+  '''
+  Method for building the info dict of a step depending on info_mode.
+  'full': A new dict is created on every step.
+  'reuse': One preallocated dict is updated in place, it must be copied to be kept over multiple steps.
+  The action mask is the live mask of the environment then, like in BattleshipsVecEnv.
+  'none': No counts are reported, an empty dict is returned.
+  '''
+  def build_info(self, miss, hit, empty, sunken):
+    if self.info_mode == 'none':
+      return {}
+    if self.info_mode == 'reuse':
+      info = self.info
+      info['action_mask'] = self.valid_actions
+    else:
+      info = {}
+      info['action_mask'] = np.copy(self.valid_actions)
+    info['miss_count'] = miss
+    info['hit_count'] = hit
+    info['empty_count'] = empty
+    info['sunken_count'] = sunken
+    return info
+
+  '''
+  OpenAI gym reset method. Gets called to set up a new game.
+  seed: Optional seed, the environment is seeded before the game is set up
+  '''
+  def reset(self, seed=None):
+    if seed is not None:
+      self.seed(seed)
     self.set_up()
 
     # Return the fresh board of the player
-    return self.radar
+    return self.observation
 
-  # OpenAi gym render method
+  '''
+  OpenAi gym render method.
+  mode: 'human' prints the radar board, 'ansi' returns it as string and 'rgb_array' returns it as image
+  '''
   def render(self, mode='human'):
-    for x in range(self.board_size):
-      # Print horizontale line
-      print("-" * (4 * self.board_size + 2))
-      for y in range(self.board_size):
-        # Get state of the current field
-        current_state_value = self.radar[x, y]
-        # Get fieldEncoding for the state of the current field
-        current_state = list(self.fieldEncoding.keys())[list(self.fieldEncoding.values()).index(current_state_value)]
-        # If state of current Field is Water, print empty space for better readability
-        current_state = (current_state if current_state != "W" else " ")
-        # Print vertical lines
-        print(" | ", end="")
-        # Print current state
-        print(current_state, end="")
-      print(" |")
-    print("-" * (4 * self.board_size + 2))
+    return self.renderer.render(self.radar, mode)
+
+  '''
+  OpenAi gym seed method. Restarts the random numbers of the environment, all following games are reproducible.
+  seed: Optional int or numpy SeedSequence, fresh entropy of the system without a seed
+  return: List with the seed
+  '''
+  def seed(self, seed=None):
+    self.random.seed(seed)
+    if self.static_placement:
+      # The static layout is drawn again from the seeded stream
+      self.placement = None
+      self.placement_ships = None
+      self.set_up()
+    return [seed]
 
   # OpenAi gym close method
   def close (self):
     print('close')
 
-  # Method to place ships on a given board
-  def place_ships(self, board):
-    # Initialize variables
-    x = 0
-    y = 0
-    ships = []
-    all_ships_placed = False
-
-    # Try to place ships until all ships could be placed
-    while not all_ships_placed:
-      # Reset placed ships list
-      ships = []
-      # Reset/Clean the board
-      for x in range(self.board_size):
-        for y in range(self.board_size):
-          board[x, y] = 0
-      # No ships have been placed
-      ships_placed = 0
-      reset = False
-
-      # Iterate over all ships to place
-      for ship_length in self.ships:
-        # Negative assumption, that the space is occupied
-        occupied = True
-        trys = 0
-
-        # Try to find a spot to place the ship
-        while occupied and not reset:
-          # Get new random coordinates on the board
-          x, y = self.get_random_coordinates()
-          # Get a new random alignment of the ship
-          is_vertical = bool(getrandbits(1))
-          #Check if the space is allready occupied
-          occupied = self.check_occupation(x, y, board, ship_length, is_vertical)
-          # Increment the trys for the current ship
-          trys += 1
-          # If no valid spot can be found, the placement of all ships must be reset
-          if trys > 1000:
-            reset = True
-        # If a valid spot is found:
-        if not reset:
-          # Create the ship and append it to the ships list
-          ships.append(Ship(ship_length, x, y, is_vertical))
-          # Increment the number of ships placed
-          ships_placed += 1
-
-          # Draw the placed ship onto the board
-          if is_vertical:
-            for i in range(ship_length):
-              board[x + i, y] = 1
-          else:
-            for i in range(ship_length):
-              board[x, y + i] = 1
-      # Check if all ships where placed
-      if ships_placed == len(self.ships):
-        all_ships_placed = True
-
-      if self.static_placement and self.placement is None:
-        self.placement = np.copy(board)
-        self.placement_ships = deepcopy(ships)
+  '''
+  Method creating the placer drawing the ship placements of new games.
+  config = Configuration Object for the battleships game
+  '''
+  def create_ship_placer(self, config):
+    return get_ship_placer(config)
+
+  '''
+  Method creating the encoder of the observations.
+  config = Configuration Object for the battleships game
+  '''
+  def create_observation_encoder(self, config):
+    return get_observation_encoder(config.observation_encoding, config.board_size)
+
+  '''
+  Method to place ships on a given board
+  board = Board to place the ships on
+  ship_board = Optional board to write the index of the placed ship on each field, -1 for water
+  ships = Optional fleet to store the placed ships in
+  '''
+  def place_ships(self, board, ship_board=None, ships=None):
+    if ship_board is None:
+      ship_board = np.empty_like(board)
+    if ships is None:
+      ships = Fleet(self.ships)
+    # Reset/Clean the board
+    board[:, :] = 0
+    ship_board[:, :] = -1
+
+    # Draw a legal placement for every ship from the precomputed placement tables
+    placements = self.ship_placer.sample(self.random)
+    for ship_index, placement in enumerate(placements):
+      ship_length = self.ships[ship_index]
+      x, y, is_vertical = self.ship_placer.get_ship(ship_index, placement)
+      # Store the ship in the fleet
+      ships.set_ship(ship_index, x, y, is_vertical)
+
+      # Draw the placed ship onto the board
+      if is_vertical:
+        board[x:x + ship_length, y] = 1
+        ship_board[x:x + ship_length, y] = ship_index
+      else:
+        board[x, y:y + ship_length] = 1
+        ship_board[x, y:y + ship_length] = ship_index
+
+    if self.static_placement and self.placement is None:
+      # Keep the layout once, it is shared read-only by all following games
+      self.placement = np.copy(board)
+      self.placement.setflags(write=False)
+      self.placement_ships = Fleet(self.ships)
+      self.placement_ships.copy_placement(ships)
+      self.placement_ship_board = np.copy(ship_board)
+      self.placement_ship_board.setflags(write=False)
 
     return ships
 
+  '''
+  Method to get the enemy ships of a new game.
+  Ships are taken from the layout pool if one is used, otherwise they are placed on the board.
+  board = Board to place the ships on
+  ship_board = Board to write the index of the placed ship on each field, -1 for water
+  ships = Fleet to store the placed ships in
+  '''
+  def draw_ships(self, board, ship_board, ships):
+    if self.layout_pool is not None and not self.static_placement:
+      return self.layout_pool.draw(board, ship_board, ships, self.random)
+    return self.place_ships(board, ship_board, ships)
+
   '''
   Method check if the space for a possible ship is occupied on a given boad.
   Arguments:
@@ -477,8 +546,8 @@ class BattleshipsEnv(gym.Env):
   '''
   def get_random_coordinates(self):
       # random number in range 0 - board_size - 1
-      x = randint(0, self.board_size - 1)
-      y = randint(0, self.board_size - 1)
+      x = self.random.randrange(self.board_size)
+      y = self.random.randrange(self.board_size)
       return x, y
 
   '''
@@ -527,22 +596,55 @@ class BattleshipsEnv(gym.Env):
     hit = False
     # Radar board field is set to miss
     self.radar[x, y] = self.fieldEncoding['0']
-    # Iterate enemyShips to check for hits
-    for ship in self.enemyShips:
-      # Check whether shoot is a hit
-      if ship.is_hit(x, y):
-        # Set radar board field to hit
-        self.radar[x, y] = self.fieldEncoding['X']
-        hit = True
-        # Check whether the ship is sunken
-        if ship.sunken():
-          # Set radar board ship fields to sunken
-          self.draw_sunken(ship, self.radar)
-
-    # Remove shoot Coordinate from list of available actions
-    self.available_actions.remove((x, y))
+    self.empty_count -= 1
+    # Look up the enemy ship placed on the field
+    ship_index = self.ship_board[x, y]
+    # Check whether shoot is a hit
+    if ship_index >= 0:
+      # Set radar board field to hit
+      self.radar[x, y] = self.fieldEncoding['X']
+      hit = True
+      # Update hit counter of the ship
+      hits = self.enemyShips.hits
+      hits[ship_index] += 1
+      ship_length = self.enemyShips.length[ship_index]
+      # Check whether the ship is sunken
+      if hits[ship_index] == ship_length:
+        # Set radar board ship fields to sunken
+        self.draw_sunken(self.enemyShips[ship_index], self.radar)
+        self.ships_afloat -= 1
+        # All hit fields of the ship are now sunken fields
+        self.hit_count -= ship_length - 1
+        self.sunken_count += ship_length
+      else:
+        self.hit_count += 1
+    else:
+      self.miss_count += 1
+
+    # Encode the new states of the radar board into a separate observation
+    if self.observation_encoder.encodes:
+      self.observe_shot(x, y, ship_index)
+
+    # Disable shoot Coordinate in the mask of valid actions
+    self.valid_actions[x * self.board_size + y] = False
     return hit
 
+  '''
+  Method writing the result of a shot into the observation if the encoding is not the radar board itself.
+  x: X Coordinate of the shot
+  y: Y Coordinate of the shot
+  ship_index: Index of the hit ship, -1 for a miss
+  '''
+  def observe_shot(self, x, y, ship_index):
+    if ship_index < 0 or self.enemyShips.hits[ship_index] < self.enemyShips.length[ship_index]:
+      self.observation_encoder.set(self.observation, x * self.board_size + y, int(self.radar[x, y]))
+      return
+    # Sunken ship: all of its fields changed
+    ship = self.enemyShips[ship_index]
+    step = self.board_size if ship.is_vertical else 1
+    fields = ship.get_x() * self.board_size + ship.get_y() + step * np.arange(ship.get_length())
+    self.observation_encoder.set_fields(self.observation[None], 0, fields, self.fieldEncoding['#'])
+
   '''
   Method for displaying a sunken ship on radar board.
   ship: Sunken ship
@@ -554,14 +656,12 @@ class BattleshipsEnv(gym.Env):
     y = ship.get_y()
     # Determine direction of the sunken ship
     if ship.is_vertical:
-      # Iterate the sunken ship and update radar board fields to sunken
-      for i in range(ship.get_length()):
-        board[x + i, y] = self.fieldEncoding['#']
+      # Update radar board fields of the sunken ship to sunken
+      board[x:x + ship.get_length(), y] = self.fieldEncoding['#']
     # sunken ship is placed horizontally
     else:
-      # Iterate the sunken ship and update radar board fields to sunken
-      for i in range(ship.get_length()):
-        board[x, y + i] = self.fieldEncoding['#']
+      # Update radar board fields of the sunken ship to sunken
+      board[x, y:y + ship.get_length()] = self.fieldEncoding['#']
 
   '''
   Method for checking if the Game is Done.
@@ -577,12 +677,13 @@ class BattleshipsEnv(gym.Env):
     # Iterate all enemy ships
     # Check if one of the enemy ships is not yet sunken
     if self.binary_reward:
-      if not self.available_actions:
+      # Every field has been shot once
+      if self.steps == self.board_size * self.board_size:
         done = True
     else:
-      for ship in self.enemyShips:
-        if not ship.sunken():
-          done = False
+      # Check if one of the enemy ships is not yet sunken
+      if self.ships_afloat > 0:
+        done = False
     return done
 
   '''
@@ -607,24 +708,61 @@ class BattleshipsEnv(gym.Env):
   '''
   def set_up(self):
     # Inits radar board with Water fields
-    self.radar = self.fieldEncoding['W'] * np.ones((self.board_size, self.board_size), dtype='int')
-    # Inits enemy board with zeros representing water
-    self.enemy_board = 0 * np.ones((self.board_size, self.board_size), dtype='int')
-    # resets available_actions
-    self.available_actions = []
-    # Init available_actions for all fields of the board
-    for x in range(self.board_size):
-      for y in range(self.board_size):
-        self.available_actions.append((x, y))
-    # places enemy ships on the enemy board
-    if self.placement_ships and self.placement is not None:
-      self.enemyShips = deepcopy(self.placement_ships)
-      self.enemy_board = np.copy(self.placement)
+    self.radar = np.full((self.board_size, self.board_size), self.fieldEncoding['W'],
+                         dtype=self.observation_encoder.radar_dtype)
+    self.observation = self.observation_encoder.empty(self.radar)
+    # Init valid_actions for all fields of the board
+    self.valid_actions = np.ones(self.board_size * self.board_size, dtype=bool)
+    # Static placement: the layout in enemyShips never changes and is not copied, only the hits are reset
+    if self.placement_ships is not None and self.placement is not None:
+      self.enemy_board = self.placement
+      self.ship_board = self.placement_ship_board
     else:
-      self.enemyShips = self.place_ships(self.enemy_board)
+      # Inits enemy board with zeros representing water
+      self.enemy_board = np.zeros((self.board_size, self.board_size), dtype='int')
+      # Inits ship index board with -1 representing water
+      self.ship_board = np.full((self.board_size, self.board_size), -1, dtype='int')
+      # places enemy ships on the enemy board
+      self.draw_ships(self.enemy_board, self.ship_board, self.enemyShips)
+
+    # Reset the hits of all enemy ships
+    self.enemyShips.reset_hits()
+    self.ships_afloat = len(self.enemyShips)
+
+    # Init state counts of the radar board, all fields are water
+    self.miss_count = 0
+    self.hit_count = 0
+    self.empty_count = self.board_size * self.board_size
+    self.sunken_count = 0
 
     self.steps = 0
 
+  '''
+  Method returning the mask of valid actions.
+  The mask has one boolean per action (index of the field), True if the field has not been shot yet.
+  The mask is updated in place on every step.
+  '''
+  def action_mask(self):
+    return self.valid_actions
+
+  '''
+  List of the coordinates of all fields which have not been shot yet.
+  Built from the action mask, use action_mask() for constant time checks.
+  '''
+  @property
+  def available_actions(self):
+    return [divmod(int(action), self.board_size) for action in np.flatnonzero(self.valid_actions)]
+
+  '''
+  Method returning the time spent in each phase of the game if profiling is enabled in the config.
+  reset: Boolean whether the measurements are cleared afterwards
+  return: Dict with calls, time and mean time in microseconds of every phase, empty if profiling is disabled
+  '''
+  def profile_stats(self, reset=False):
+    if self.profiler is None:
+      return {}
+    return self.profiler.stats(reset)
+
   '''
   Method calculates the maximum mean reward threshold for the callback in training. 
   '''
@@ -0,0 +1,208 @@
+import multiprocessing
+
+import numpy as np
+from .BattleshipsVecEnv import BattleshipsVecEnv
+from .Profiler import merge_stats
+from .ObservationEncoder import get_observation_encoder
+
+"""
+Class representing battleships games played in multiple worker processes.
+Every worker plays a slice of the boards with a BattleshipsVecEnv and writes observations, rewards, done flags
+and info counts straight into shared memory arrays. Only short commands are sent through the pipes.
+"""
+class BattleshipsSubprocVecEnv(BattleshipsVecEnv):
+  """
+  Constructor for the multi process battleships environment
+  Arguments:
+  config = Configuration Object for the battleships game.
+  num_envs = Number of boards played at the same time.
+  n_workers = Number of worker processes, the boards are split evenly between them.
+  start_method = Optional multiprocessing start method, e.g. 'spawn' or 'fork'.
+  """
+  def __init__(self, config, num_envs, n_workers, start_method=None):
+    n_workers = min(n_workers, num_envs)
+    board_size = config.board_size
+    fields = board_size * board_size
+    encoder = get_observation_encoder(config.observation_encoding, board_size)
+    observation_shape = (num_envs,) + encoder.shape
+
+    # Shape and type of every array shared with the workers
+    layout = {
+      'actions': ((num_envs,), np.int64),
+      'radar': ((num_envs, board_size, board_size), encoder.radar_dtype),
+      'valid_actions': ((num_envs, fields), np.bool_),
+      'rewards': ((num_envs,), np.float32),
+      'dones': ((num_envs,), np.bool_),
+      'valid': ((num_envs,), np.bool_),
+      'counts': ((num_envs, 4), np.int_),
+      'terminal_observations': (observation_shape, encoder.dtype),
+      'terminal_valid_actions': ((num_envs, fields), np.bool_)
+    }
+    # Encoded observations are shared besides the radar boards
+    if encoder.encodes:
+      layout['observations'] = (observation_shape, encoder.dtype)
+    context = multiprocessing.get_context(start_method)
+    buffers = {}
+    for name, (shape, dtype) in layout.items():
+      buffers[name] = context.RawArray('b', int(np.prod(shape)) * np.dtype(dtype).itemsize)
+    self.shared = shared_arrays(buffers, layout)
+
+    super(BattleshipsSubprocVecEnv, self).__init__(config, num_envs, radar=self.shared['radar'],
+                                                   valid_actions=self.shared['valid_actions'],
+                                                   observations=self.shared.get('observations'))
+
+    # Start the workers, each plays the boards from start to end with an independent random stream
+    bounds = np.linspace(0, num_envs, n_workers + 1).astype(int)
+    seeds = self.placer.random.seed_sequence.spawn(n_workers)
+    self.remotes = []
+    self.processes = []
+    for start, end, seed in zip(bounds[:-1], bounds[1:], seeds):
+      remote, worker_remote = context.Pipe()
+      process = context.Process(target=worker, args=(worker_remote, config, start, end, buffers, layout, seed),
+                                daemon=True)
+      process.start()
+      worker_remote.close()
+      self.remotes.append(remote)
+      self.processes.append(process)
+    self.closed = False
+
+  # VecEnv reset method. Sets up a new game on every board in all workers.
+  def reset(self):
+    for remote in self.remotes:
+      remote.send(('reset', None))
+    for remote in self.remotes:
+      remote.recv()
+    return np.copy(self.observations)
+
+  '''
+  Method seeding all workers, every worker gets an independent child stream of the seed.
+  seed: Optional int or numpy SeedSequence
+  '''
+  def seed(self, seed=None):
+    self.placer.seed(seed)
+    seeds = self.placer.random.seed_sequence.spawn(len(self.remotes))
+    for remote, worker_seed in zip(self.remotes, seeds):
+      remote.send(('seed', worker_seed))
+    for remote in self.remotes:
+      remote.recv()
+    return [seed for _ in range(self.num_envs)]
+
+  def step_async(self, actions):
+    self.shared['actions'][:] = np.asarray(actions).reshape(self.num_envs)
+    for remote in self.remotes:
+      remote.send(('step', None))
+
+  '''
+  Step function for all boards, waits for all workers and reads their results from shared memory.
+  Has the same semantics as BattleshipsVecEnv.step_wait.
+  '''
+  def step_wait(self):
+    for remote in self.remotes:
+      remote.recv()
+
+    rewards = np.copy(self.shared['rewards'])
+    done = np.copy(self.shared['dones'])
+    valid = self.shared['valid']
+    counts = self.shared['counts']
+
+    infos = []
+    for index in range(self.num_envs):
+      # Finished games are reset by the workers, their last board is kept in the terminal arrays
+      if done[index]:
+        action_mask = self.shared['terminal_valid_actions'][index]
+      else:
+        action_mask = self.valid_actions[index]
+      miss, hit, empty, sunken = counts[index]
+      info = self.build_info(index, valid[index], miss, hit, empty, sunken, action_mask)
+      if done[index]:
+        info['terminal_observation'] = np.copy(self.shared['terminal_observations'][index])
+      infos.append(info)
+
+    return np.copy(self.observations), rewards, done, infos
+
+  '''
+  Method returning the time spent in each phase of the games of all workers if profiling is enabled.
+  reset: Boolean whether the measurements are cleared afterwards
+  '''
+  def profile_stats(self, reset=False):
+    for remote in self.remotes:
+      remote.send(('profile', reset))
+    return merge_stats([remote.recv() for remote in self.remotes])
+
+  def close(self):
+    if self.closed:
+      return
+    for remote in self.remotes:
+      remote.send(('close', None))
+    for process in self.processes:
+      process.join()
+    self.closed = True
+
+
+'''
+Method creating numpy views on shared memory buffers.
+buffers: Dict of shared memory buffers
+layout: Dict with shape and type of every buffer
+'''
+def shared_arrays(buffers, layout):
+  arrays = {}
+  for name, (shape, dtype) in layout.items():
+    arrays[name] = np.frombuffer(buffers[name], dtype=dtype).reshape(shape)
+  return arrays
+
+'''
+Method running in a worker process.
+Plays the boards from start to end and writes the results into the shared arrays.
+remote: Pipe to receive commands from the main process
+config: Configuration Object for the battleships game
+start: Index of the first board of the worker
+end: Index after the last board of the worker
+buffers: Dict of shared memory buffers
+layout: Dict with shape and type of every buffer
+seed: SeedSequence of the random stream of the worker
+'''
+def worker(remote, config, start, end, buffers, layout, seed):
+  shared = {name: array[start:end] for name, array in shared_arrays(buffers, layout).items()}
+  env = BattleshipsVecEnv(config, end - start, radar=shared['radar'], valid_actions=shared['valid_actions'],
+                         observations=shared.get('observations'))
+  env.seed(seed)
+  step = lambda: worker_step(env, shared)
+  if env.profiler is not None:
+    # The worker steps its boards itself, they are measured as the step_wait of a batched environment
+    step = env.profiler.wrap('step_wait', step)
+  while True:
+    command, data = remote.recv()
+    if command == 'step':
+      step()
+      remote.send(True)
+    elif command == 'reset':
+      env.reset()
+      remote.send(True)
+    elif command == 'seed':
+      env.seed(data)
+      remote.send(True)
+    elif command == 'profile':
+      remote.send(env.profile_stats(data))
+    elif command == 'close':
+      remote.close()
+      break
+
+'''
+Method stepping the boards of a worker and writing the results into shared memory.
+env: BattleshipsVecEnv of the worker
+shared: Dict with the slices of the shared arrays of the worker
+'''
+def worker_step(env, shared):
+  rewards, done, valid = env.shoot(shared['actions'])
+  shared['rewards'][:] = rewards
+  shared['dones'][:] = done
+  shared['valid'][:] = valid
+  shared['counts'][:, 0] = env.miss_count
+  shared['counts'][:, 1] = env.hit_count
+  shared['counts'][:, 2] = env.empty_count
+  shared['counts'][:, 3] = env.sunken_count
+  # Keep the last board of finished games and start new ones
+  for index in np.flatnonzero(done):
+    shared['terminal_observations'][index] = env.observations[index]
+    shared['terminal_valid_actions'][index] = env.valid_actions[index]
+    env.set_up(index)
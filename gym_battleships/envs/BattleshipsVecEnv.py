@@ -0,0 +1,340 @@
+import numpy as np
+from .BattleshipsEnv import BattleshipsEnv
+from .Fleet import Fleet
+from .Profiler import Profiler, merge_stats
+from .Renderer import tile_images
+
+# Phases of the batched games measured if profiling is enabled in the config
+PROFILED_VEC_PHASES = ('step_wait', 'shoot', 'build_info', 'set_up')
+
+# Stable Baselines is only needed to register the class as a VecEnv for training.
+# The batched environment itself works without it.
+try:
+  from stable_baselines.common.vec_env import VecEnv
+except ImportError:
+  VecEnv = object
+
+"""
+Class representing N battleships games as one vectorized environment.
+All boards are stored as stacked numpy arrays, so a step of all games is a single vectorized call.
+"""
+class BattleshipsVecEnv(VecEnv):
+  metadata = {'render.modes': ['human', 'ansi', 'rgb_array']}
+
+  """
+  Constructor for the batched battleships environment
+  Arguments:
+  config = Configuration Object for the battleships game.
+  num_envs = Number of boards played at the same time.
+  radar = Optional preallocated array for the radar boards, e.g. in shared memory.
+  valid_actions = Optional preallocated array for the masks of valid actions, e.g. in shared memory.
+  observations = Optional preallocated array for the encoded observations, only used by the 'packed'
+  and 'onehot' encodings, otherwise the radar boards are the observations.
+  """
+  def __init__(self, config, num_envs, radar=None, valid_actions=None, observations=None):
+    # Single environment used to place the ships and to share spaces and encodings
+    self.placer = BattleshipsEnv(config)
+
+    self.num_envs = num_envs
+    self.observation_space = self.placer.observation_space
+    self.action_space = self.placer.action_space
+    self.binary_reward = config.binary_reward
+    self.info_mode = config.info_mode
+    self.board_size = config.board_size
+    self.ships = config.ships
+    self.fieldEncoding = self.placer.fieldEncoding
+    self.observation_encoder = self.placer.observation_encoder
+
+    # The player boards "radar" where the shots of every game are registered
+    if radar is None:
+      radar = np.zeros((num_envs, self.board_size, self.board_size), dtype=self.observation_encoder.radar_dtype)
+    self.radar = radar
+    # Observations of all boards in the encoding of the config, updated along with the radar boards
+    if observations is None or not self.observation_encoder.encodes:
+      observations = self.observation_encoder.allocate(radar)
+    self.observations = observations
+    # The enemy boards where the ships are placed
+    self.enemy_board = np.zeros((num_envs, self.board_size, self.board_size), dtype='int')
+    # Index of the ship placed on a field, -1 for water
+    self.ship_board = np.zeros((num_envs, self.board_size, self.board_size), dtype='int')
+    # Boolean mask of all valid actions (fields which have not been shot yet)
+    if valid_actions is None:
+      valid_actions = np.zeros((num_envs, self.board_size * self.board_size), dtype=bool)
+    self.valid_actions = valid_actions
+    # Ships of all boards with their hits, shape (num_envs, number of ships)
+    self.enemyShips = Fleet(self.ships, num_envs)
+    # Number of ships not sunken yet
+    self.ships_afloat = np.zeros(num_envs, dtype='int')
+    # Number of fields per state on the radar boards, updated on every shot
+    self.miss_count = np.zeros(num_envs, dtype='int')
+    self.hit_count = np.zeros(num_envs, dtype='int')
+    self.empty_count = np.zeros(num_envs, dtype='int')
+    self.sunken_count = np.zeros(num_envs, dtype='int')
+    # Info dicts reused on every step if info_mode is 'reuse'
+    self.infos = [{} for _ in range(num_envs)]
+    self.steps = np.zeros(num_envs, dtype='int')
+
+    self.actions = None
+
+    # Optional profiler, placing the ships is measured by the profiler of the single environment
+    self.profiler = None
+    if config.profile:
+      self.profiler = Profiler(config.profile == 'allocations')
+      self.profiler.instrument(self, PROFILED_VEC_PHASES)
+
+  '''
+  Method to set up a new game on a single board.
+  index: Index of the board to set up
+  '''
+  def set_up(self, index):
+    self.radar[index] = self.fieldEncoding['W']
+    self.observation_encoder.reset(self.observations, index)
+    self.valid_actions[index] = True
+    # Place the ships with the logic of the single environment
+    ships = self.enemyShips.board(index)
+    if self.placer.static_placement:
+      ships.copy_placement(self.placer.placement_ships)
+      self.enemy_board[index] = self.placer.placement
+      self.ship_board[index] = self.placer.placement_ship_board
+    else:
+      self.placer.draw_ships(self.enemy_board[index], self.ship_board[index], ships)
+    ships.reset_hits()
+    self.ships_afloat[index] = len(ships)
+    self.steps[index] = 0
+    self.miss_count[index] = 0
+    self.hit_count[index] = 0
+    self.empty_count[index] = self.board_size * self.board_size
+    self.sunken_count[index] = 0
+
+  # VecEnv reset method. Sets up a new game on every board.
+  def reset(self):
+    for index in range(self.num_envs):
+      self.set_up(index)
+
+    # Return a copy, the observations get updated in place
+    return np.copy(self.observations)
+
+  def step_async(self, actions):
+    self.actions = actions
+
+  '''
+  Step function for all boards.
+  Has the same reward and info semantics as BattleshipsEnv.step.
+  Finished boards are reset automatically, their last board is stored in info['terminal_observation'].
+  '''
+  def step_wait(self):
+    rewards, done, valid = self.shoot(self.actions)
+
+    # Add count information to info, for debug and possible calculations of statistics
+    infos = []
+    for index in range(self.num_envs):
+      info = self.build_info(index, valid[index], self.miss_count[index], self.hit_count[index],
+                             self.empty_count[index], self.sunken_count[index], self.valid_actions[index])
+      # Store the last board of a finished game and start a new one
+      if done[index]:
+        info['terminal_observation'] = np.copy(self.observations[index])
+        self.set_up(index)
+      infos.append(info)
+
+    return np.copy(self.observations), rewards, done, infos
+
+  '''
+  Method for shooting on all boards at once, without resetting finished games.
+  actions: Array with the index of the field to shoot for every board
+  return: Rewards, done flags and whether the action was valid for every board
+  '''
+  def shoot(self, actions):
+    actions = np.asarray(actions).reshape(self.num_envs)
+    boards = np.arange(self.num_envs)
+
+    # Map the actions to the boards and get x,y coordinates of the next fields to shoot
+    x, y = np.unravel_index(actions, (self.board_size, self.board_size))
+
+    # Check if x, y allready have been shot. Shooting a field twice ends the game.
+    valid = self.valid_actions[boards, actions]
+    boards_valid = boards[valid]
+    x_valid = x[valid]
+    y_valid = y[valid]
+
+    # Shoot coordinates of all valid actions
+    ship_index = self.ship_board[boards_valid, x_valid, y_valid]
+    hit_valid = ship_index >= 0
+    states = np.where(hit_valid, self.fieldEncoding['X'], self.fieldEncoding['0'])
+    self.radar[boards_valid, x_valid, y_valid] = states
+    if self.observation_encoder.encodes:
+      self.observation_encoder.set_fields(self.observations, boards_valid, actions[valid], states)
+    self.valid_actions[boards_valid, actions[valid]] = False
+    self.steps[boards_valid] += 1
+    self.empty_count[boards_valid] -= 1
+    self.miss_count[boards_valid[~hit_valid]] += 1
+
+    # Count the hits on the ships and check whether they are sunken
+    boards_hit = boards_valid[hit_valid]
+    ships_hit = ship_index[hit_valid]
+    self.enemyShips.hits[boards_hit, ships_hit] += 1
+    sunken = self.enemyShips.hits[boards_hit, ships_hit] == self.enemyShips.length[boards_hit, ships_hit]
+    boards_sunken = boards_hit[sunken]
+    self.hit_count[boards_hit[~sunken]] += 1
+    if len(boards_sunken):
+      # Set radar board ship fields to sunken
+      sunken_fields = self.ship_board[boards_sunken] == ships_hit[sunken][:, None, None]
+      self.radar[boards_sunken] = np.where(sunken_fields, self.fieldEncoding['#'], self.radar[boards_sunken])
+      if self.observation_encoder.encodes:
+        sunken_boards, sunken_x, sunken_y = np.nonzero(sunken_fields)
+        self.observation_encoder.set_fields(self.observations, boards_sunken[sunken_boards],
+                                            sunken_x * self.board_size + sunken_y, self.fieldEncoding['#'])
+      self.ships_afloat[boards_sunken] -= 1
+      # All hit fields of the ships are now sunken fields
+      sunken_lengths = self.enemyShips.length[boards_sunken, ships_hit[sunken]]
+      self.hit_count[boards_sunken] -= sunken_lengths - 1
+      self.sunken_count[boards_sunken] += sunken_lengths
+
+    hit = np.zeros(self.num_envs, dtype=bool)
+    hit[boards_hit] = True
+
+    # Check if games are done
+    if self.binary_reward:
+      done = self.steps == self.board_size * self.board_size
+    else:
+      done = self.ships_afloat == 0
+
+    # Calculate rewards
+    if self.binary_reward:
+      rewards = np.ones(self.num_envs)
+    else:
+      rewards = 20.0 * hit
+      rewards[done] += 100 * ((self.board_size * self.board_size) / self.steps[done])
+      rewards = np.round(rewards)
+
+    # Shooting a forbidden field ends the game with a negative reward
+    invalid = ~valid
+    rewards[invalid] = -1 if self.binary_reward else -1000
+    done[invalid] = True
+
+    return rewards.astype(np.float32), done, valid
+
+  '''
+  Method for building the info dict of a board like BattleshipsEnv.build_info.
+  index: Index of the board
+  valid: Boolean whether the action of the board was valid, counts are 0 otherwise
+  miss, hit, empty, sunken: Counts of the radar board
+  action_mask: Mask of valid actions of the board
+  '''
+  def build_info(self, index, valid, miss, hit, empty, sunken, action_mask):
+    if self.info_mode == 'none':
+      return {}
+    if self.info_mode == 'reuse':
+      info = self.infos[index]
+      info.pop('terminal_observation', None)
+    else:
+      info = {}
+    if not valid:
+      miss = hit = empty = sunken = 0
+    info['miss_count'] = miss
+    info['hit_count'] = hit
+    info['empty_count'] = empty
+    info['sunken_count'] = sunken
+    if self.info_mode == 'reuse':
+      info['action_mask'] = action_mask
+    else:
+      info['action_mask'] = np.copy(action_mask)
+    return info
+
+  def step(self, actions):
+    self.step_async(actions)
+    return self.step_wait()
+
+  '''
+  Render method for all boards like BattleshipsEnv.render.
+  mode: 'human' prints all radar boards, 'ansi' returns them as list of strings
+  and 'rgb_array' returns one image with the boards arranged in a grid
+  '''
+  def render(self, mode='human'):
+    renderer = self.placer.renderer
+    if mode == 'rgb_array':
+      return tile_images(self.get_images())
+    frames = [renderer.ansi(radar) for radar in self.radar]
+    if mode == 'ansi':
+      return frames
+    print(''.join(frames), end='')
+
+  '''
+  Method returning the masks of valid actions of all boards, shape (num_envs, board_size * board_size).
+  The masks are updated in place on every step.
+  '''
+  def action_mask(self):
+    return self.valid_actions
+
+  '''
+  Method returning the time spent in each phase of the games if profiling is enabled in the config.
+  Contains the phases of the batched games and the placement phases of the single environment.
+  reset: Boolean whether the measurements are cleared afterwards
+  '''
+  def profile_stats(self, reset=False):
+    if self.profiler is None:
+      return {}
+    return merge_stats([self.profiler.stats(reset), self.placer.profile_stats(reset)])
+
+  def close(self):
+    pass
+
+  '''
+  Method seeding the placement of the ships of all boards.
+  seed: Optional int or numpy SeedSequence
+  '''
+  def seed(self, seed=None):
+    self.placer.seed(seed)
+    return [seed for _ in range(self.num_envs)]
+
+  '''
+  Method returning an attribute of the batched environment.
+  Attributes stored per board are returned per board, all others once per board.
+  '''
+  def get_attr(self, attr_name, indices=None):
+    value = getattr(self, attr_name)
+    indices = self._indices(indices)
+    if isinstance(value, np.ndarray) and value.shape[:1] == (self.num_envs,):
+      return [value[index] for index in indices]
+    return [value for _ in indices]
+
+  '''
+  Method setting an attribute of the batched environment.
+  Attributes stored per board are set for the given boards, all others are shared by all boards
+  and can only be set for all of them.
+  '''
+  def set_attr(self, attr_name, value, indices=None):
+    current = getattr(self, attr_name, None)
+    if isinstance(current, np.ndarray) and current.shape[:1] == (self.num_envs,):
+      current[list(self._indices(indices))] = value
+    elif indices is None or sorted(set(self._indices(indices))) == list(range(self.num_envs)):
+      setattr(self, attr_name, value)
+    else:
+      raise ValueError('Attribute %s is shared by all boards and can not be set for a subset' % attr_name)
+
+  '''
+  Method calling a method of the single environment, e.g. calculate_threshold.
+  '''
+  def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+    method = getattr(self.placer, method_name)
+    return [method(*method_args, **method_kwargs) for _ in self._indices(indices)]
+
+  # Images of all radar boards, rendered in one pass
+  def get_images(self):
+    return self.placer.renderer.rgb_array(self.radar)
+
+  @property
+  def unwrapped(self):
+    return self
+
+  def _indices(self, indices):
+    if indices is None:
+      return range(self.num_envs)
+    if isinstance(indices, int):
+      return [indices]
+    return indices
+
+  '''
+  Method calculates the maximum mean reward threshold for the callback in training.
+  '''
+  def calculate_threshold(self):
+    return self.placer.calculate_threshold()
@@ -0,0 +1,153 @@
+import numpy as np
+
+"""
+Class representing the enemy ships of one or many boards as numpy arrays.
+Every attribute is an array with one entry per ship, for batched environments with a leading board dimension.
+Ships are stored in the order of placement, i.e. the order of config.ships.
+"""
+class Fleet:
+  """
+  Constructor for a Fleet object
+  Arguments:
+  ships = List of the lengths of the ships.
+  boards = Optional number of boards, adds a leading board dimension to all arrays.
+  """
+  def __init__(self, ships, boards=None):
+    shape = (len(ships),) if boards is None else (boards, len(ships))
+    # Length of the ships
+    self.length = np.broadcast_to(np.array(ships, dtype='int'), shape).copy()
+    # Starting X and Y coordinates of the ships
+    self.x = np.zeros(shape, dtype='int')
+    self.y = np.zeros(shape, dtype='int')
+    # Boolean whether ship direction is vertically or horizontally
+    self.is_vertical = np.zeros(shape, dtype=bool)
+    # Number of hits of the ships in the current game
+    self.hits = np.zeros(shape, dtype='int')
+
+  '''
+  Method returning the fleet of one board of a batched fleet.
+  The returned fleet shares the arrays, updates are visible in both.
+  index: Index of the board
+  '''
+  def board(self, index):
+    fleet = Fleet.__new__(Fleet)
+    fleet.length = self.length[index]
+    fleet.x = self.x[index]
+    fleet.y = self.y[index]
+    fleet.is_vertical = self.is_vertical[index]
+    fleet.hits = self.hits[index]
+    return fleet
+
+  '''
+  Method for placing a ship of the fleet.
+  index: Index of the ship
+  x: Starting X coordinate
+  y: Starting Y coordinate
+  is_vertical: Boolean whether ship direction is vertically or horizontally
+  '''
+  def set_ship(self, index, x, y, is_vertical):
+    self.x[index] = x
+    self.y[index] = y
+    self.is_vertical[index] = is_vertical
+
+  '''
+  Method for copying the placement of another fleet with the same ships.
+  '''
+  def copy_placement(self, fleet):
+    self.x[...] = fleet.x
+    self.y[...] = fleet.y
+    self.is_vertical[...] = fleet.is_vertical
+
+  '''
+  Method for resetting the hits of all ships for a new game.
+  '''
+  def reset_hits(self):
+    self.hits[...] = 0
+
+  '''
+  Method returning a boolean array whether the ships are sunken.
+  '''
+  def sunken(self):
+    return self.hits == self.length
+
+  def __len__(self):
+    return self.length.shape[-1]
+
+  def __getitem__(self, index):
+    return ShipView(self, index)
+
+  def __iter__(self):
+    for index in range(len(self)):
+      yield ShipView(self, index)
+
+
+"""
+Class representing a single ship of a fleet with the same methods as Ship.
+The view stores no data itself, all attributes are read from and written to the fleet arrays.
+"""
+class ShipView:
+  __slots__ = ('fleet', 'index')
+
+  def __init__(self, fleet, index):
+    self.fleet = fleet
+    self.index = index
+
+  @property
+  def length(self):
+    return int(self.fleet.length[self.index])
+
+  @property
+  def x(self):
+    return int(self.fleet.x[self.index])
+
+  @property
+  def y(self):
+    return int(self.fleet.y[self.index])
+
+  @property
+  def is_vertical(self):
+    return bool(self.fleet.is_vertical[self.index])
+
+  @property
+  def hits(self):
+    return int(self.fleet.hits[self.index])
+
+  '''
+  Method for counting hits.
+  '''
+  def hit(self):
+    self.fleet.hits[self.index] += 1
+
+  '''
+  Method for checking if the ship is sunken.
+  '''
+  def sunken(self):
+    return self.hits == self.length
+
+  def get_length(self):
+    return self.length
+
+  def get_x(self):
+    return self.x
+
+  def get_y(self):
+    return self.y
+
+  def get_is_vertical(self):
+    return self.is_vertical
+
+  '''
+  Method for checking shoot hitting a part of the ship.
+  x_hit: x Coordinate of the shoot
+  y_hit: y Coordinate of the shoot
+  '''
+  def is_hit(self, x_hit, y_hit):
+    x = self.x
+    y = self.y
+    if self.is_vertical:
+      hit = y == y_hit and x <= x_hit < x + self.length
+    else:
+      hit = x == x_hit and y <= y_hit < y + self.length
+    if hit:
+      self.hit()
+    return hit
@@ -0,0 +1,119 @@
+import json
+
+import numpy as np
+from .ShipPlacer import get_ship_placer
+from .RandomStream import default_stream
+
+# Bytes of the intermediate arrays of a batch of placements, the batch size of generate is derived from it
+BATCH_BYTES = 64 * 1024 * 1024
+
+"""
+Class representing a pool of pre-generated ship layouts stored in a memory mapped file.
+Each layout stores start coordinates and alignment of every ship and a packed occupancy bitmap.
+The file is mapped read-only, so multiple processes can share it without copying.
+"""
+class LayoutPool:
+  """
+  Constructor for a LayoutPool object
+  Arguments:
+  path = Path of the layout file created by LayoutPool.generate.
+  """
+  def __init__(self, path):
+    self.path = path
+    with open(path + '.json') as file:
+      meta = json.load(file)
+    self.board_size = meta['board_size']
+    self.ships = meta['ships']
+    self.gap = meta['gap']
+    # Map the layouts read-only, pages are loaded on demand and shared between processes
+    self.layouts = np.load(path, mmap_mode='r')
+
+  '''
+  Method generating a layout file for a configuration.
+  config: Configuration Object for the battleships game
+  count: Number of layouts to generate
+  path: Path of the layout file, the configuration is stored next to it in path + '.json'
+  batch_size: Maximum number of layouts placed at once, by default as many as fit into BATCH_BYTES
+  seed: Optional seed to generate the same layouts again
+  '''
+  @staticmethod
+  def generate(config, count, path, batch_size=None, seed=None):
+    placer = get_ship_placer(config)
+    # Sampling a batch compares every fleet with every placement of the largest table (uint64 words),
+    # and draws a float per placement, so large boards need small batches
+    placements = max(len(table) for table in placer.tables)
+    max_batch = max(BATCH_BYTES // (placements * (placer.words * 8 + 17)), 1)
+    batch_size = max_batch if batch_size is None else min(batch_size, max_batch)
+    generator = np.random.default_rng(seed)
+    layouts = np.lib.format.open_memmap(path, mode='w+', dtype=layout_dtype(config.board_size, config.ships),
+                                        shape=(count,))
+    ship_lengths = np.array(config.ships)
+    fields = config.board_size * config.board_size
+    for start in range(0, count, batch_size):
+      end = min(start + batch_size, count)
+      placements = placer.sample_batch(end - start, generator)
+      ships = np.zeros((end - start, len(config.ships), 3), dtype=layouts.dtype['ships'].base)
+      occupancy = np.zeros((end - start, fields), dtype=bool)
+      for ship_index, table in enumerate(placer.tables):
+        placement = placements[:, ship_index]
+        x = table.x[placement]
+        y = table.y[placement]
+        is_vertical = table.is_vertical[placement]
+        ships[:, ship_index, 0] = x
+        ships[:, ship_index, 1] = y
+        ships[:, ship_index, 2] = is_vertical
+        # Mark all fields of the ship as occupied
+        for i in range(ship_lengths[ship_index]):
+          occupancy[np.arange(end - start), (x + i * is_vertical) * config.board_size + y + i * ~is_vertical] = True
+      layouts['ships'][start:end] = ships
+      layouts['occupancy'][start:end] = np.packbits(occupancy, axis=1)
+    layouts.flush()
+    del layouts
+
+    with open(path + '.json', 'w') as file:
+      json.dump({'board_size': config.board_size, 'ships': list(config.ships), 'gap': config.gap, 'count': count},
+                file)
+
+  '''
+  Method checking whether the layouts fit to a configuration.
+  config: Configuration Object for the battleships game
+  '''
+  def matches(self, config):
+    return self.board_size == config.board_size and list(self.ships) == list(config.ships) and self.gap == config.gap
+
+  '''
+  Method drawing a random layout onto the given boards.
+  board: Enemy board, ship fields are set to 1
+  ship_board: Board with the index of the ship on each field, -1 for water
+  ships: Fleet to store the placed ships in
+  random: Optional RandomStream of the environment
+  return: Fleet of the placed ships
+  '''
+  def draw(self, board, ship_board, ships, random=default_stream):
+    layout = self.layouts[random.randrange(len(self.layouts))]
+    fields = self.board_size * self.board_size
+    board[:, :] = np.unpackbits(layout['occupancy'])[:fields].reshape(self.board_size, self.board_size)
+    ship_board[:, :] = -1
+    placement = layout['ships']
+    ships.x[...] = placement[:, 0]
+    ships.y[...] = placement[:, 1]
+    ships.is_vertical[...] = placement[:, 2]
+    for ship_index, (x, y, is_vertical) in enumerate(placement.tolist()):
+      ship_length = self.ships[ship_index]
+      if is_vertical:
+        ship_board[x:x + ship_length, y] = ship_index
+      else:
+        ship_board[x, y:y + ship_length] = ship_index
+    return ships
+
+  def __len__(self):
+    return len(self.layouts)
+
+
+'''
+Method returning the numpy record type of a layout.
+'''
+def layout_dtype(board_size, ships):
+  coordinate = np.uint8 if board_size <= 255 else np.uint16
+  return np.dtype([('ships', coordinate, (len(ships), 3)),
+                   ('occupancy', np.uint8, (-(-board_size * board_size // 8),))])
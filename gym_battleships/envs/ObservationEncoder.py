@@ -0,0 +1,192 @@
+import numpy as np
+from gym import spaces
+
+# Encodings of the observations selectable with Config.observation_encoding
+OBSERVATION_ENCODINGS = ('int', 'int8', 'packed', 'onehot')
+
+"""
+Class describing observations which are the radar board itself, 'int' (int64 like before) or 'int8'.
+The environments return their radar board directly, nothing has to be encoded on a shot.
+Encoders of other formats keep their observation up to date field by field on every shot,
+so an observation is never converted from the radar board as a whole.
+"""
+class ObservationEncoder:
+  # Boolean whether the observation is a separate array which has to be updated along with the radar board
+  encodes = False
+
+  """
+  Constructor for an ObservationEncoder object
+  Arguments:
+  board_size = Number of fields in x and y direction.
+  dtype = Type of the radar board and the observations.
+  """
+  def __init__(self, board_size, dtype='int'):
+    self.board_size = board_size
+    self.radar_dtype = np.dtype(dtype)
+    self.dtype = self.radar_dtype
+    self.shape = (board_size, board_size)
+
+  # Observation space of the encoding, values are the states of BattleshipsEnv.fieldEncoding
+  def space(self):
+    return spaces.Box(low=-1, high=2, shape=self.shape, dtype=self.dtype)
+
+  '''
+  Method returning the observation of a new, empty radar board.
+  radar: The new radar board
+  '''
+  def empty(self, radar):
+    return radar
+
+  '''
+  Method allocating the observations of multiple boards, e.g. of a vector environment.
+  radar: Radar boards of shape (num_envs, board_size, board_size)
+  '''
+  def allocate(self, radar):
+    return radar
+
+  '''
+  Method resetting the observation of one board to an empty radar board.
+  observations: Observations of all boards
+  index: Index of the board
+  '''
+  def reset(self, observations, index):
+    pass
+
+  '''
+  Method writing the state of one field into the observation of a single board.
+  observation: Observation of the board
+  field: Index of the field on the flat board
+  state: New state of the field
+  '''
+  def set(self, observation, field, state):
+    pass
+
+  '''
+  Method writing the states of many fields into the observations of multiple boards at once.
+  Multiple fields of the same board may be written in one call, e.g. all fields of a sunken ship.
+  observations: Observations of all boards, shape (num_envs,) + shape
+  boards: Index of the board of every field
+  fields: Index of every field on the flat board
+  states: New state of every field or one state for all
+  '''
+  def set_fields(self, observations, boards, fields, states):
+    pass
+
+  '''
+  Method returning the radar boards of observations, e.g. for agents or rendering.
+  observations: Observation or observations of multiple boards
+  '''
+  def decode(self, observations):
+    return np.asarray(observations)
+
+
+"""
+Class encoding the radar board in 2 bits per field, 4 fields per byte.
+Field f is stored in byte f // 4 at the bits 2 * (f % 4) and up, with the code state & 3:
+water 0, hit 1, sunken 2 and miss 3. An empty radar board is all zeros.
+"""
+class PackedObservationEncoder(ObservationEncoder):
+  encodes = True
+
+  def __init__(self, board_size):
+    super(PackedObservationEncoder, self).__init__(board_size, np.int8)
+    self.dtype = np.dtype(np.uint8)
+    self.shape = ((board_size * board_size + 3) // 4,)
+
+  def space(self):
+    return spaces.Box(low=0, high=255, shape=self.shape, dtype=np.uint8)
+
+  def empty(self, radar):
+    return np.zeros(self.shape, dtype=self.dtype)
+
+  def allocate(self, radar):
+    return np.zeros((len(radar),) + self.shape, dtype=self.dtype)
+
+  def reset(self, observations, index):
+    observations[index] = 0
+
+  def set(self, observation, field, state):
+    shift = (field & 3) << 1
+    byte = field >> 2
+    observation[byte] = int(observation[byte]) & ~(3 << shift) | (state & 3) << shift
+
+  def set_fields(self, observations, boards, fields, states):
+    fields = np.asarray(fields)
+    shifts = ((fields & 3) << 1).astype(np.uint8)
+    flat = observations.reshape(-1)
+    indices = np.asarray(boards) * self.shape[0] + (fields >> 2)
+    # Fields sharing a byte are written one after another by the unbuffered ufunc.at
+    np.bitwise_and.at(flat, indices, ~(np.uint8(3) << shifts))
+    np.bitwise_or.at(flat, indices, ((np.asarray(states) & 3).astype(np.uint8) << shifts))
+
+  def decode(self, observations):
+    observations = np.asarray(observations)
+    bits = np.unpackbits(observations[..., None], axis=-1, bitorder='little')
+    codes = bits.reshape(observations.shape[:-1] + (-1, 2))
+    codes = codes[..., 0] + 2 * codes[..., 1]
+    fields = self.board_size * self.board_size
+    # Code 3 is a miss (-1)
+    radar = ((codes[..., :fields].astype(np.int8) + 1) & 3) - 1
+    return radar.reshape(observations.shape[:-1] + (self.board_size, self.board_size))
+
+
+"""
+Class encoding the radar board as one-hot tensor of shape (board_size, board_size, 4).
+The channels are the states in the order of their packed code: water, hit, sunken and miss.
+"""
+class OneHotObservationEncoder(ObservationEncoder):
+  encodes = True
+
+  def __init__(self, board_size):
+    super(OneHotObservationEncoder, self).__init__(board_size, np.int8)
+    self.dtype = np.dtype(np.uint8)
+    self.shape = (board_size, board_size, 4)
+    # One-hot vector of every state code
+    self.channels = np.eye(4, dtype=self.dtype)
+
+  def space(self):
+    return spaces.Box(low=0, high=1, shape=self.shape, dtype=np.uint8)
+
+  def empty(self, radar):
+    observation = np.zeros(self.shape, dtype=self.dtype)
+    observation[..., 0] = 1
+    return observation
+
+  def allocate(self, radar):
+    observations = np.zeros((len(radar),) + self.shape, dtype=self.dtype)
+    observations[..., 0] = 1
+    return observations
+
+  def reset(self, observations, index):
+    observations[index] = 0
+    observations[index, ..., 0] = 1
+
+  def set(self, observation, field, state):
+    channels = observation[divmod(field, self.board_size)]
+    channels[:] = 0
+    channels[state & 3] = 1
+
+  def set_fields(self, observations, boards, fields, states):
+    flat = observations.reshape(len(observations), -1, 4)
+    flat[boards, fields] = self.channels[np.asarray(states) & 3]
+
+  def decode(self, observations):
+    codes = np.argmax(observations, axis=-1).astype(np.int8)
+    return ((codes + 1) & 3) - 1
+
+
+'''
+Method creating the encoder of an observation encoding.
+encoding: One of OBSERVATION_ENCODINGS
+board_size: Number of fields in x and y direction
+'''
+def get_observation_encoder(encoding, board_size):
+  if encoding == 'int':
+    return ObservationEncoder(board_size, 'int')
+  if encoding == 'int8':
+    return ObservationEncoder(board_size, np.int8)
+  if encoding == 'packed':
+    return PackedObservationEncoder(board_size)
+  if encoding == 'onehot':
+    return OneHotObservationEncoder(board_size)
+  raise ValueError('Unknown observation encoding %r, expected one of %s' % (encoding, ', '.join(OBSERVATION_ENCODINGS)))
@@ -0,0 +1,106 @@
+import sys
+import time
+
+"""
+Class measuring the time spent in the phases of an environment, e.g. shoot, check_done or place_ships.
+Methods are instrumented by replacing them with timed wrappers on the instance only,
+so environments without a profiler run the plain methods without any overhead.
+Times of nested phases are included in the outer phase, e.g. shoot in step.
+"""
+class Profiler:
+  """
+  Constructor for a Profiler object
+  Arguments:
+  allocations = Boolean whether the number of newly allocated memory blocks is counted per phase as well.
+  """
+  def __init__(self, allocations=False):
+    self.allocations = allocations
+    # Calls, seconds and allocated blocks of every phase, the lists are updated in place by the wrappers
+    self.records = {}
+
+  '''
+  Method replacing methods of an object with timed wrappers.
+  obj: Object to instrument, e.g. an environment
+  phases: Names of the methods to measure
+  '''
+  def instrument(self, obj, phases):
+    for phase in phases:
+      setattr(obj, phase, self.wrap(phase, getattr(obj, phase)))
+
+  '''
+  Method creating a timed wrapper of a method.
+  phase: Name under which the calls are recorded
+  method: Bound method to wrap
+  '''
+  def wrap(self, phase, method):
+    record = self.records.setdefault(phase, [0, 0.0, 0])
+    clock = time.perf_counter
+    if self.allocations:
+      allocated_blocks = sys.getallocatedblocks
+
+      def wrapper(*args, **kwargs):
+        blocks = allocated_blocks()
+        start = clock()
+        try:
+          return method(*args, **kwargs)
+        finally:
+          record[1] += clock() - start
+          record[2] += allocated_blocks() - blocks
+          record[0] += 1
+    else:
+      def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+          return method(*args, **kwargs)
+        finally:
+          record[1] += clock() - start
+          record[0] += 1
+    return wrapper
+
+  '''
+  Method returning the measurements of all phases.
+  reset: Boolean whether the measurements are cleared afterwards
+  return: Dict with calls, time in seconds, mean time in microseconds and allocated blocks of every phase
+  '''
+  def stats(self, reset=False):
+    stats = {}
+    for phase, (calls, seconds, blocks) in self.records.items():
+      stats[phase] = phase_stats(calls, seconds, blocks if self.allocations else None)
+    if reset:
+      self.reset()
+    return stats
+
+  # Clears all measurements
+  def reset(self):
+    for record in self.records.values():
+      record[:] = [0, 0.0, 0]
+
+
+'''
+Method building the measurements of a phase.
+calls: Number of calls
+seconds: Time spent in the phase
+blocks: Number of allocated memory blocks, None if not counted
+'''
+def phase_stats(calls, seconds, blocks=None):
+  stats = {'calls': calls, 'time': seconds, 'mean_us': seconds / calls * 1e6 if calls else 0.0}
+  if blocks is not None:
+    stats['allocated_blocks'] = blocks
+  return stats
+
+'''
+Method adding up the measurements of multiple profilers, e.g. of all environments of a vector environment.
+Phases without calls are left out.
+stats_list: List of dicts returned by Profiler.stats
+'''
+def merge_stats(stats_list):
+  totals = {}
+  for stats in stats_list:
+    for phase, values in stats.items():
+      if not values['calls']:
+        continue
+      calls, seconds, blocks = totals.get(phase, (0, 0.0, None))
+      if 'allocated_blocks' in values:
+        blocks = (blocks or 0) + values['allocated_blocks']
+      totals[phase] = (calls + values['calls'], seconds + values['time'], blocks)
+  return {phase: phase_stats(*values) for phase, values in totals.items()}
@@ -0,0 +1,57 @@
+import numpy as np
+
+"""
+Class providing the random numbers of an environment from its own numpy Generator.
+Numbers are drawn from the generator in blocks and handed out one by one, so a single draw does not pay
+the overhead of a numpy call. Child streams spawned from the seed sequence are independent of each other,
+e.g. for the workers of a multi process environment.
+"""
+class RandomStream:
+  """
+  Constructor for a RandomStream object
+  Arguments:
+  seed = Optional seed, an int or a numpy SeedSequence. Without a seed fresh entropy of the system is used.
+  block_size = Number of random numbers drawn from the generator at once.
+  """
+  def __init__(self, seed=None, block_size=4096):
+    self.block_size = block_size
+    self.seed(seed)
+
+  '''
+  Method restarting the stream from a seed, numbers left in the current block are dropped.
+  seed: Optional int or numpy SeedSequence
+  '''
+  def seed(self, seed=None):
+    if isinstance(seed, np.random.SeedSequence):
+      self.seed_sequence = seed
+    else:
+      self.seed_sequence = np.random.SeedSequence(seed)
+    self.generator = np.random.default_rng(self.seed_sequence)
+    self.block = iter(())
+
+  '''
+  Method returning a random float in [0, 1).
+  '''
+  def random(self):
+    for value in self.block:
+      return value
+    self.block = iter(self.generator.random(self.block_size).tolist())
+    return next(self.block)
+
+  '''
+  Method returning a random int in [0, stop), like random.randrange.
+  stop: Upper bound of the int
+  '''
+  def randrange(self, stop):
+    return int(self.random() * stop)
+
+  '''
+  Method creating independent child streams.
+  count: Number of child streams
+  '''
+  def spawn(self, count):
+    return [RandomStream(child, self.block_size) for child in self.seed_sequence.spawn(count)]
+
+
+# Stream of callers without their own stream, e.g. placers used outside of an environment
+default_stream = RandomStream()
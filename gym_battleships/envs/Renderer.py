@@ -0,0 +1,101 @@
+import numpy as np
+
+# Colors of the field states in rgb_array mode
+STATE_COLORS = {'W': (30, 90, 170), 'X': (230, 120, 30), '#': (140, 20, 20), '0': (200, 200, 200)}
+GRID_COLOR = (20, 20, 20)
+
+"""
+Class rendering radar boards in one vectorized pass through lookup tables indexed by the field states.
+Modes: 'human' prints the text frame, 'ansi' returns it as string and 'rgb_array' returns an image.
+All modes accept a single radar board, rgb_array also batches of boards, e.g. all observations of an episode.
+"""
+class Renderer:
+  """
+  Constructor for a Renderer object
+  Arguments:
+  fieldEncoding = Encoding of the radar board, like BattleshipsEnv.fieldEncoding.
+  cell_size = Number of pixels per field in rgb_array mode, including the grid line.
+  """
+  def __init__(self, fieldEncoding, cell_size=16):
+    self.fieldEncoding = fieldEncoding
+    self.cell_size = cell_size
+    # Field states are shifted to start at 0 to index the lookup tables
+    self.offset = -min(fieldEncoding.values())
+    states = max(fieldEncoding.values()) + self.offset + 1
+    self.symbols = np.full(states, ord('?'), dtype=np.uint8)
+    tiles = np.zeros((states, cell_size, cell_size, 3), dtype=np.uint8)
+    for state, value in fieldEncoding.items():
+      # Water is shown as empty space for better readability
+      self.symbols[value + self.offset] = ord(state if state != 'W' else ' ')
+      tiles[value + self.offset] = STATE_COLORS.get(state, (0, 0, 0))
+    # Grid line on the top and left of every field
+    tiles[:, 0, :] = GRID_COLOR
+    tiles[:, :, 0] = GRID_COLOR
+    self.tiles = tiles
+    self.templates = {}
+
+  '''
+  Method rendering a radar board.
+  radar: Radar board
+  mode: 'human', 'ansi' or 'rgb_array'
+  '''
+  def render(self, radar, mode='human'):
+    if mode == 'rgb_array':
+      return self.rgb_array(radar)
+    frame = self.ansi(radar)
+    if mode == 'ansi':
+      return frame
+    print(frame, end='')
+
+  '''
+  Method returning the text frame of a radar board, the same as the original render printed field by field.
+  radar: Radar board
+  '''
+  def ansi(self, radar):
+    rows, columns = radar.shape
+    frame = self.template(rows, columns).copy()
+    # Every second line holds the fields, each field is at every fourth character
+    frame[1::2, 3:4 * columns:4] = self.symbols[radar + self.offset]
+    return frame.tobytes().decode('ascii')
+
+  '''
+  Method returning the characters of an empty text frame with all lines and separators.
+  rows, columns: Shape of the radar board
+  '''
+  def template(self, rows, columns):
+    key = (rows, columns)
+    if key not in self.templates:
+      width = 4 * columns + 2
+      frame = np.full((2 * rows + 1, width + 1), ord(' '), dtype=np.uint8)
+      frame[0::2, :width] = ord('-')
+      frame[1::2, 1:width:4] = ord('|')
+      frame[:, width] = ord('\n')
+      self.templates[key] = frame
+    return self.templates[key]
+
+  '''
+  Method returning the image of a radar board or a batch of radar boards.
+  radar: Radar board of shape (rows, columns) or boards of shape (..., rows, columns)
+  return: Image of shape (..., rows * cell_size, columns * cell_size, 3)
+  '''
+  def rgb_array(self, radar):
+    radar = np.asarray(radar)
+    rows, columns = radar.shape[-2:]
+    tiles = self.tiles[radar + self.offset]
+    # (..., rows, columns, cell, cell, 3) -> (..., rows, cell, columns, cell, 3)
+    tiles = np.swapaxes(tiles, -4, -3)
+    return tiles.reshape(radar.shape[:-2] + (rows * self.cell_size, columns * self.cell_size, 3))
+
+
+'''
+Method arranging images of the same size in a grid, e.g. the boards of a vector environment.
+images: Array of images of shape (count, height, width, 3)
+'''
+def tile_images(images):
+  count, height, width, channels = images.shape
+  columns = int(np.ceil(np.sqrt(count)))
+  rows = int(np.ceil(count / columns))
+  grid = np.zeros((rows * columns, height, width, channels), dtype=images.dtype)
+  grid[:count] = images
+  grid = grid.reshape(rows, columns, height, width, channels).swapaxes(1, 2)
+  return grid.reshape(rows * height, columns * width, channels)
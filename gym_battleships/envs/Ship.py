@@ -2,8 +2,7 @@
 Class representing a ship object
 """
 class Ship:
-    # A ship has zero hits initially
-    hits = 0
+    __slots__ = ('length', 'x', 'y', 'is_vertical', 'hits')
 
     """
     Constructor for a Ship object
@@ -18,6 +17,8 @@ class Ship:
         self.x = x
         self.y = y
         self.is_vertical = is_vertical
+        # A ship has zero hits initially
+        self.hits = 0
 
     '''
     Method for counting hits.
@@ -0,0 +1,330 @@
+import numpy as np
+from .RandomStream import default_stream
+
+# Random placements tried against the occupied fields before the compatible placements are searched in the table
+PLACEMENT_TRIES = 8
+
+"""
+Class representing all legal placements of a ship with a given length on an empty board.
+Each placement is stored as a bitmask of the fields of the ship and a bitmask of the
+fields which must be free to place the ship (the ship and with gap its neighbours).
+The rules are the same as in BattleshipsEnv.check_occupation.
+"""
+class PlacementTable:
+  """
+  Constructor for a PlacementTable object
+  Arguments:
+  board_size = Number of fields in x and y direction.
+  ship_length = Length of the ship to place.
+  gap = Boolean whether ships need a gap of at least 1 water field between each other.
+  """
+  def __init__(self, board_size, ship_length, gap):
+    self.board_size = board_size
+    self.ship_length = ship_length
+    self.gap = gap
+
+    x = []
+    y = []
+    is_vertical = []
+    ship_fields = []
+    forbidden_fields = []
+
+    # Enumerate every start field and alignment of the ship once
+    for vertical in (True, False):
+      for start_x in range(board_size):
+        for start_y in range(board_size):
+          # Map horizontal placements onto vertical ones by swapping the axes
+          if vertical:
+            along, across = start_x, start_y
+          else:
+            along, across = start_y, start_x
+          area = self.get_area(along, across)
+          if area is None:
+            continue
+          ship_board = np.zeros((board_size, board_size), dtype=bool)
+          forbidden_board = np.zeros((board_size, board_size), dtype=bool)
+          (ship_along, ship_across), (forbidden_along, forbidden_across) = area
+          if vertical:
+            ship_board[ship_along, ship_across] = True
+            forbidden_board[forbidden_along, forbidden_across] = True
+          else:
+            ship_board[ship_across, ship_along] = True
+            forbidden_board[forbidden_across, forbidden_along] = True
+          x.append(start_x)
+          y.append(start_y)
+          is_vertical.append(vertical)
+          ship_fields.append(ship_board.ravel())
+          forbidden_fields.append(forbidden_board.ravel())
+
+    # Start coordinates and alignment of each placement
+    self.x = np.array(x, dtype='int')
+    self.y = np.array(y, dtype='int')
+    self.is_vertical = np.array(is_vertical, dtype=bool)
+    # Bitmasks of the ship fields and the fields which must be free
+    self.ship_mask = pack_fields(np.array(ship_fields, dtype=bool).reshape(-1, board_size * board_size))
+    self.forbidden_mask = pack_fields(np.array(forbidden_fields, dtype=bool).reshape(-1, board_size * board_size))
+    # The same bitmasks as python ints, a single placement is checked faster than with numpy
+    self.ship_bits = [int.from_bytes(mask.tobytes(), 'little') for mask in self.ship_mask]
+    self.forbidden_bits = [int.from_bytes(mask.tobytes(), 'little') for mask in self.forbidden_mask]
+
+  '''
+  Method returning the fields of a vertical ship and the fields which must be free to place it.
+  Horizontal ships use the same rules with swapped axes.
+  Returns None if the ship can not be placed at the start field.
+  along: Start coordinate in direction of the ship
+  across: Start coordinate across the direction of the ship
+  '''
+  def get_area(self, along, across):
+    return placement_area(self.board_size, self.ship_length, self.gap, along, across)
+
+  '''
+  Method returning the indices of all placements which can be placed on a board.
+  occupied: Bitmask of the occupied fields of the board
+  '''
+  def get_compatible(self, occupied):
+    return np.flatnonzero(~(self.forbidden_mask & occupied).any(axis=1))
+
+  def __len__(self):
+    return len(self.x)
+
+
+"""
+Class placing a fleet of ships without rejection sampling.
+For every ship a placement is drawn uniformly from all placements which are still
+legal on the current board, like the random tries in BattleshipsEnv.place_ships.
+"""
+class ShipPlacer:
+  """
+  Constructor for a ShipPlacer object
+  Arguments:
+  board_size = Number of fields in x and y direction.
+  ships = List of the lengths of the ships to place, in order of placement.
+  gap = Boolean whether ships need a gap of at least 1 water field between each other.
+  """
+  def __init__(self, board_size, ships, gap):
+    self.board_size = board_size
+    self.ships = ships
+    self.gap = gap
+    self.tables = [get_placement_table(board_size, ship_length, gap) for ship_length in ships]
+    # Number of 64 bit words of a bitmask
+    self.words = self.tables[0].ship_mask.shape[1] if ships else 0
+
+  '''
+  Method drawing a placement for every ship.
+  A few random placements of the whole table are tried first, the first one which fits is uniform among the
+  compatible placements as well. Only if all tries fail the compatible placements are searched in the table,
+  so sparse boards cost a few checks per ship and crowded boards never loop long.
+  random: Optional RandomStream of the environment, placers are shared by all environments of a configuration
+  return: List with the index of the placement in the table of each ship
+  '''
+  def sample(self, random=default_stream):
+    while True:
+      occupied = 0
+      placements = []
+      for table in self.tables:
+        placement = self.try_placements(table, occupied, random)
+        if placement is None:
+          compatible = table.get_compatible(self.occupied_mask(placements))
+          # No legal placement left, the placement of all ships must be reset
+          if len(compatible) == 0:
+            break
+          placement = int(compatible[random.randrange(len(compatible))])
+        occupied |= table.ship_bits[placement]
+        placements.append(placement)
+      else:
+        return placements
+
+  '''
+  Method drawing random placements of a table until one does not touch the occupied fields.
+  table: PlacementTable of the ship
+  occupied: Bitmask of the occupied fields as python int
+  random: RandomStream to draw from
+  return: Index of the placement or None if all tries failed
+  '''
+  def try_placements(self, table, occupied, random):
+    forbidden = table.forbidden_bits
+    for _ in range(PLACEMENT_TRIES if forbidden else 0):
+      placement = random.randrange(len(forbidden))
+      if not forbidden[placement] & occupied:
+        return placement
+    return None
+
+  # Bitmask of the fields of placed ships as numpy words, the placements are in the order of the tables
+  def occupied_mask(self, placements):
+    occupied = np.zeros(self.words, dtype=np.uint64)
+    for table, placement in zip(self.tables, placements):
+      occupied |= table.ship_mask[placement]
+    return occupied
+
+  '''
+  Method drawing placements for many fleets at once, e.g. to fill a layout pool.
+  count: Number of fleets to place
+  generator: Optional numpy Generator, the global numpy random state otherwise
+  return: Array of shape (count, number of ships) with the placement indices
+  '''
+  def sample_batch(self, count, generator=None):
+    generator = np.random if generator is None else generator
+    placements = np.zeros((count, len(self.tables)), dtype='int')
+    pending = np.arange(count)
+    while len(pending):
+      occupied = np.zeros((len(pending), self.words), dtype=np.uint64)
+      placed = np.ones(len(pending), dtype=bool)
+      for ship_index, table in enumerate(self.tables):
+        # Compatible placements of each fleet, shape (fleets, placements)
+        compatible = ~(table.forbidden_mask[None, :, :] & occupied[:, None, :]).any(axis=2)
+        placed &= compatible.any(axis=1)
+        # Uniform choice among the compatible placements
+        placement = np.argmax(compatible * generator.random(compatible.shape), axis=1)
+        occupied |= table.ship_mask[placement]
+        placements[pending, ship_index] = placement
+      # Fleets without a legal placement for a ship are placed again
+      pending = pending[~placed]
+    return placements
+
+  '''
+  Method returning start coordinates and alignment of a placement of a ship.
+  ship_index: Index of the ship in the fleet
+  placement: Index of the placement in the table of the ship
+  '''
+  def get_ship(self, ship_index, placement):
+    table = self.tables[ship_index]
+    return int(table.x[placement]), int(table.y[placement]), bool(table.is_vertical[placement])
+
+
+"""
+Class placing a fleet of ships on large boards by rejection sampling with sets of occupied fields.
+Placement tables grow with the board area, this placer only needs memory for the ship fields.
+A random start field and alignment is drawn until the ship can be placed, like the random tries of the
+original placement. This is uniform among the legal placements, like ShipPlacer.
+"""
+class SparseShipPlacer:
+  """
+  Constructor for a SparseShipPlacer object
+  Arguments:
+  board_size = Number of fields in x and y direction.
+  ships = List of the lengths of the ships to place, in order of placement.
+  gap = Boolean whether ships need a gap of at least 1 water field between each other.
+  max_tries = Number of tries to place a ship before the placement of all ships is reset.
+  """
+  def __init__(self, board_size, ships, gap, max_tries=10000):
+    self.board_size = board_size
+    self.ships = ships
+    self.gap = gap
+    self.max_tries = max_tries
+
+  '''
+  Method drawing a placement for every ship.
+  random: Optional RandomStream of the environment
+  return: List with start coordinates and alignment of each ship and dict with the ship index of every ship field
+  '''
+  def sample(self, random=default_stream):
+    while True:
+      cells = {}
+      placements = []
+      for ship_index, ship_length in enumerate(self.ships):
+        placement = self.place(ship_index, ship_length, cells, random)
+        # No legal placement found, the placement of all ships must be reset
+        if placement is None:
+          break
+        placements.append(placement)
+      else:
+        return placements, cells
+
+  '''
+  Method placing a single ship by random tries.
+  ship_index: Index of the ship in the fleet
+  ship_length: Length of the ship
+  cells: Dict with the ship index of every occupied field, the ship is added to it
+  random: RandomStream to draw the tries from
+  return: Start coordinates and alignment of the ship or None if no legal placement was found
+  '''
+  def place(self, ship_index, ship_length, cells, random=default_stream):
+    board_size = self.board_size
+    randrange = random.randrange
+    for _ in range(self.max_tries):
+      is_vertical = randrange(2) == 0
+      x = randrange(board_size)
+      y = randrange(board_size)
+      along, across = (x, y) if is_vertical else (y, x)
+      area = placement_area(board_size, ship_length, self.gap, along, across)
+      if area is None:
+        continue
+      (ship_along, _), (forbidden_along, forbidden_across) = area
+      # Index of a field on the flat board, horizontal ships have swapped axes
+      step_along, step_across = (board_size, 1) if is_vertical else (1, board_size)
+      forbidden = [a * step_along + c * step_across for a in range(forbidden_along.start, forbidden_along.stop)
+                   for c in range(forbidden_across.start, min(forbidden_across.stop, board_size))]
+      if any(field in cells for field in forbidden):
+        continue
+      for a in range(ship_along.start, ship_along.stop):
+        cells[a * step_along + across * step_across] = ship_index
+      return x, y, is_vertical
+    return None
+
+
+'''
+Method returning the fields of a vertical ship and the fields which must be free to place it.
+Horizontal ships use the same rules with swapped axes.
+Returns None if the ship can not be placed at the start field.
+board_size: Number of fields in x and y direction
+ship_length: Length of the ship
+gap: Boolean whether ships need a gap of at least 1 water field between each other
+along: Start coordinate in direction of the ship
+across: Start coordinate across the direction of the ship
+'''
+def placement_area(board_size, ship_length, gap, along, across):
+  length = ship_length
+  end = along + length - 1
+  ship_area = (slice(along, end + 1), slice(across, across + 1))
+  if not gap:
+    # Without a gap the ship must end before the last row/column
+    if end >= board_size - 1:
+      return None
+    return ship_area, ship_area
+  # With a gap the ship may not start in the first row/column
+  if along == 0 or end >= board_size:
+    return None
+  # The row/column after the ship is only checked for ships longer than one field,
+  # these must also end before the last row/column
+  if length > 1:
+    if end == board_size - 1:
+      return None
+    forbidden_end = end + 1
+  else:
+    forbidden_end = end
+  forbidden_area = (slice(along - 1, forbidden_end + 1), slice(max(across - 1, 0), across + 2))
+  return ship_area, forbidden_area
+
+'''
+Method packing boolean fields into bitmasks of 64 bit words.
+fields: Boolean array with the fields of a board in the last dimension
+'''
+def pack_fields(fields):
+  words = -(-fields.shape[-1] // 64)
+  padded = np.zeros(fields.shape[:-1] + (words * 64,), dtype=bool)
+  padded[..., :fields.shape[-1]] = fields
+  return np.packbits(padded, axis=-1, bitorder='little').view(np.uint64)
+
+
+# Tables and placers are shared by all environments with the same configuration
+placement_tables = {}
+ship_placers = {}
+
+'''
+Method returning the cached PlacementTable for a ship length.
+'''
+def get_placement_table(board_size, ship_length, gap):
+  key = (board_size, ship_length, gap)
+  if key not in placement_tables:
+    placement_tables[key] = PlacementTable(board_size, ship_length, gap)
+  return placement_tables[key]
+
+'''
+Method returning the cached ShipPlacer for a configuration.
+config: Configuration Object for the battleships game
+'''
+def get_ship_placer(config):
+  key = (config.board_size, tuple(config.ships), config.gap)
+  if key not in ship_placers:
+    ship_placers[key] = ShipPlacer(config.board_size, list(config.ships), config.gap)
+  return ship_placers[key]
@@ -0,0 +1,181 @@
+import numpy as np
+from .BattleshipsEnv import BattleshipsEnv
+from .Fleet import Fleet
+from .ShipPlacer import SparseShipPlacer
+from .ObservationEncoder import get_observation_encoder
+
+"""
+Class representing a board which stores only the fields of the ships in a dict.
+Fields are read like on a numpy board with board[x, y].
+"""
+class SparseBoard:
+  """
+  Constructor for a SparseBoard object
+  Arguments:
+  board_size = Number of fields in x and y direction.
+  cells = Dict with the ship index of every ship field, keys are the index of the field on the flat board.
+  default = Value of the fields without a ship.
+  value = Optional value of all ship fields, otherwise the ship index is returned.
+  """
+  def __init__(self, board_size, cells, default, value=None):
+    self.board_size = board_size
+    self.cells = cells
+    self.default = default
+    self.value = value
+
+  def __getitem__(self, key):
+    x, y = key
+    ship_index = self.cells.get(x * self.board_size + y)
+    if ship_index is None:
+      return self.default
+    return ship_index if self.value is None else self.value
+
+  # Method creating the dense numpy board, e.g. for debugging or rendering
+  def dense(self):
+    board = np.full(self.board_size * self.board_size, self.default, dtype='int')
+    if self.cells:
+      fields = np.fromiter(self.cells.keys(), dtype='int', count=len(self.cells))
+      values = np.fromiter(self.cells.values(), dtype='int', count=len(self.cells))
+      board[fields] = values if self.value is None else self.value
+    return board.reshape(self.board_size, self.board_size)
+
+
+"""
+Class representing the battleships game for large boards, e.g. 50x50 and up.
+The ships are stored sparse as dict of their fields and placed by rejection sampling instead of placement tables.
+The radar board (int8) and the mask of valid actions are kept dense for the observations,
+but only the shot fields are reset for a new game. The cost of a step and a reset scales with the
+number of ships and shots instead of the board area.
+Has the same gym interface and reward semantics as BattleshipsEnv. Layout pools are not supported.
+"""
+class SparseBattleshipsEnv(BattleshipsEnv):
+  """
+  Constructor for the large board battleships environment
+  Arguments:
+  config = Configuration Object for the battleships game.
+  """
+  def __init__(self, config):
+    if config.layout_pool is not None:
+      raise ValueError('Layout pools are not supported by SparseBattleshipsEnv')
+    # Index of every shot field of the current game, set up with the first game
+    self.shots = None
+    super(SparseBattleshipsEnv, self).__init__(config)
+
+  def create_ship_placer(self, config):
+    return SparseShipPlacer(config.board_size, list(config.ships), config.gap)
+
+  # The radar board is always int8, the default 'int' encoding returns it as well
+  def create_observation_encoder(self, config):
+    encoding = config.observation_encoding
+    return get_observation_encoder('int8' if encoding == 'int' else encoding, config.board_size)
+
+  '''
+  Method to place ships on given boards
+  board = Optional dense board to place the ships on
+  ship_board = Optional SparseBoard or dense board to write the index of the placed ship on each field
+  ships = Optional fleet to store the placed ships in
+  '''
+  def place_ships(self, board=None, ship_board=None, ships=None):
+    if ships is None:
+      ships = Fleet(self.ships)
+    placements, cells = self.ship_placer.sample(self.random)
+    for ship_index, (x, y, is_vertical) in enumerate(placements):
+      ships.set_ship(ship_index, x, y, is_vertical)
+
+    if isinstance(ship_board, SparseBoard):
+      ship_board.cells = cells
+    elif ship_board is not None:
+      ship_board[:, :] = -1
+      for field, ship_index in cells.items():
+        ship_board[divmod(field, self.board_size)] = ship_index
+    if board is not None:
+      board[:, :] = 0
+      for field in cells:
+        board[divmod(field, self.board_size)] = 1
+
+    if self.static_placement and self.placement is None:
+      # Keep the layout once, it is shared read-only by all following games
+      self.placement = cells
+      self.placement_ships = Fleet(self.ships)
+      self.placement_ships.copy_placement(ships)
+    return ships
+
+  '''
+  Method to setup the game environment.
+  The boards are allocated once, afterwards only the fields shot in the last game are reset.
+  '''
+  def set_up(self):
+    if self.shots is None:
+      self.radar = np.full((self.board_size, self.board_size), self.fieldEncoding['W'], dtype=np.int8)
+      self.observation = self.observation_encoder.empty(self.radar)
+      self.valid_actions = np.ones(self.board_size * self.board_size, dtype=bool)
+      self.ship_board = SparseBoard(self.board_size, {}, -1)
+    elif self.shots:
+      # Sunken fields have been shot as well, so resetting the shot fields restores the empty radar
+      shots = np.array(self.shots, dtype='int')
+      self.radar.ravel()[shots] = self.fieldEncoding['W']
+      self.observation_encoder.set_fields(self.observation[None], 0, shots, self.fieldEncoding['W'])
+      self.valid_actions[shots] = True
+    self.shots = []
+
+    # Static placement: the layout never changes, only the hits are reset
+    if self.placement is not None:
+      self.ship_board.cells = self.placement
+    else:
+      self.place_ships(None, self.ship_board, self.enemyShips)
+    self.enemy_board = SparseBoard(self.board_size, self.ship_board.cells, 0, 1)
+
+    # Reset the hits of all enemy ships
+    self.enemyShips.reset_hits()
+    self.ships_afloat = len(self.enemyShips)
+
+    # Init state counts of the radar board, all fields are water
+    self.miss_count = 0
+    self.hit_count = 0
+    self.empty_count = self.board_size * self.board_size
+    self.sunken_count = 0
+
+    self.steps = 0
+
+  '''
+  Method for shooting on the enemy board, remembers the field to reset it for the next game.
+  x: X Coordinate to shoot
+  y: Y Coordinate to shoot
+  '''
+  def shoot(self, x, y):
+    self.shots.append(x * self.board_size + y)
+    return super(SparseBattleshipsEnv, self).shoot(x, y)
+
+  '''
+  Method for building the info dict of a step like BattleshipsEnv.build_info.
+  The dense action mask is not copied on a step in any info_mode, the info holds the live mask of the environment,
+  which changes in place. Use shot_fields to keep the shots of a step.
+  '''
+  def build_info(self, miss, hit, empty, sunken):
+    if self.info_mode == 'none':
+      return {}
+    info = self.info if self.info_mode == 'reuse' else {}
+    info['miss_count'] = miss
+    info['hit_count'] = hit
+    info['empty_count'] = empty
+    info['sunken_count'] = sunken
+    info['action_mask'] = self.valid_actions
+    return info
+
+  '''
+  Method for counting all states currently present on the radar board.
+  The counts of the own radar board are kept up to date on every shot, other boards are counted.
+  state: Numpy Array of all states present on the radar board
+  '''
+  def count_states(self, state):
+    if state is self.radar:
+      return self.miss_count, self.hit_count, self.empty_count, self.sunken_count
+    return super(SparseBattleshipsEnv, self).count_states(state)
+
+  '''
+  Method returning the shot fields and their state on the radar board, a sparse form of the observation.
+  return: Index of every shot field on the flat board and its state
+  '''
+  def shot_fields(self):
+    fields = np.array(self.shots, dtype='int')
+    return fields, self.radar.ravel()[fields]
@@ -1 +1,9 @@
 from gym_battleships.envs.BattleshipsEnv import *
+from gym_battleships.envs.BattleshipsVecEnv import *
+from gym_battleships.envs.LayoutPool import *
+from gym_battleships.envs.Fleet import *
+from gym_battleships.envs.BattleshipsSubprocVecEnv import *
+from gym_battleships.envs.SparseBattleshipsEnv import *
+from gym_battleships.envs.Renderer import *
+from gym_battleships.envs.ObservationEncoder import *
+from gym_battleships.envs.RandomStream import *